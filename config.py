@@ -81,5 +81,141 @@ TECH_KEYWORDS = [
     "dushanbe", "ashgabat"
 ]
 
+# Категории ключевых слов для фильтрации: новость подходит, если в заголовке есть
+# технология и стартап/инвестиции/компания, либо любое слово из TECH_KEYWORDS
+KEYWORD_CATEGORIES = {
+    "startup": [
+        "стартап", "стартапы", "startup", "startups", "единорог", "unicorn",
+        "акселератор", "инкубатор", "accelerator", "incubator", "венчур", "venture"
+    ],
+    "investment": [
+        "инвестиции", "инвестиция", "investment", "investments", "финансирование",
+        "funding", "раунд", "round", "серия", "series", "капитал", "capital",
+        "фонд", "fund", "инвестор", "investor", "спонсор", "sponsor"
+    ],
+    "tech": [
+        "технологии", "технология", "technology", "tech", "искусственный интеллект",
+        "ИИ", "AI", "блокчейн", "blockchain", "криптовалюта", "crypto", "финтех",
+        "fintech", "цифровизация", "digital", "IT", "айти", "программирование",
+        "programming", "разработка", "development", "софт", "software", "приложение",
+        "application", "данные", "data", "машинное обучение", "machine learning",
+        "нейросеть", "neural network", "автоматизация", "automation", "робот",
+        "robot", "инновации", "innovation", "интернет вещей", "IoT", "облако",
+        "cloud", "кибербезопасность", "cybersecurity", "VR", "AR", "метавселенная",
+        "metaverse", "Web3", "DeFi", "NFT", "токен", "token"
+    ],
+    "company": [
+        "компания", "компании", "company", "компаний", "корпорация", "corporation",
+        "фирма", "firm", "предприятие", "enterprise", "организация", "organization",
+        "бизнес", "business", "предпринимательство", "entrepreneurship"
+    ]
+}
+
 # Check interval in minutes
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "30"))
+
+# Адаптивный опрос источников: интервал каждого подстраивается под частоту его публикаций
+# в пределах POLL_MIN_INTERVAL..POLL_MAX_INTERVAL минут; CHECK_INTERVAL - начальный интервал
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "5"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "120"))
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))  # случайный сдвиг, доля интервала
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", "30"))  # как часто проверять расписание
+POLL_SCHEDULE_FILE = os.getenv("POLL_SCHEDULE_FILE", os.path.join("data", "poll_schedule.json"))
+
+# Fetching sources: timeouts in seconds
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "15"))
+# Общий лимит времени на один цикл парсинга всех источников
+FETCH_CYCLE_DEADLINE = float(os.getenv("FETCH_CYCLE_DEADLINE", "60"))
+# Максимальное число одновременно загружаемых источников
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+
+# Здоровье источников: статистика по последним HEALTH_WINDOW опросам; после
+# CIRCUIT_FAILURE_THRESHOLD ошибок подряд источник отключается на CIRCUIT_BASE_BACKOFF минут,
+# пауза удваивается после каждой неудачной пробы (до CIRCUIT_MAX_BACKOFF)
+HEALTH_WINDOW = int(os.getenv("HEALTH_WINDOW", "50"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_BASE_BACKOFF = float(os.getenv("CIRCUIT_BASE_BACKOFF", "5"))
+CIRCUIT_MAX_BACKOFF = float(os.getenv("CIRCUIT_MAX_BACKOFF", "360"))
+
+# Файл кэша HTTP-валидаторов (ETag / Last-Modified) для условных запросов
+HTTP_CACHE_FILE = os.getenv("HTTP_CACHE_FILE", os.path.join("data", "http_cache.json"))
+
+# Бэкенд разбора HTML: html.parser, lxml-fast (lxml без BeautifulSoup), lxml, auto.
+# Деревья lxml на некорректной разметке отличаются, поэтому по умолчанию html.parser
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "html.parser")
+
+# RSS/Atom: auto - искать ленту на странице источника и читать ее вместо HTML, off - только HTML
+FEED_MODE = os.getenv("FEED_MODE", "auto")
+FEEDS_FILE = os.getenv("FEEDS_FILE", os.path.join("data", "feeds.json"))
+# Как часто заново искать ленту у источников, где ее не нашли (в часах)
+FEED_REDISCOVERY_HOURS = float(os.getenv("FEED_REDISCOVERY_HOURS", "24"))
+
+# Останавливать разбор источника после стольких уже обработанных ссылок подряд (0 - не останавливать)
+EARLY_STOP_KNOWN_LINKS = int(os.getenv("EARLY_STOP_KNOWN_LINKS", "10"))
+
+# Частичный разбор HTML для бэкендов на BeautifulSoup: строить только контейнеры статей
+HTML_PARTIAL_PARSING = os.getenv("HTML_PARTIAL_PARSING", "true").lower() in ("1", "true", "yes")
+# Замерять и писать в лог время и память полного и частичного разбора каждого источника
+PARSE_PROFILE = os.getenv("PARSE_PROFILE", "false").lower() in ("1", "true", "yes")
+
+# Общий HTTP-пул для всех источников
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))  # число хостов в пуле
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "4"))  # соединений на один хост
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+# Предел ожидания перед повтором, в том числе по заголовку Retry-After, секунд
+HTTP_MAX_RETRY_WAIT = float(os.getenv("HTTP_MAX_RETRY_WAIT", "5"))
+# Максимальный размер тела ответа (после распаковки), байт
+HTTP_MAX_BODY_BYTES = int(os.getenv("HTTP_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+
+# Хранилище данных бота: sqlite (по умолчанию) или json (старые файлы в data/)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite")
+DATABASE_FILE = os.getenv("DATABASE_FILE", os.path.join("data", "news.db"))
+
+# Фильтр Блума для истории опубликованных ссылок
+DEDUP_FILTER_FILE = os.getenv("DEDUP_FILTER_FILE", os.path.join("data", "links.bloom"))
+DEDUP_FILTER_CAPACITY = int(os.getenv("DEDUP_FILTER_CAPACITY", "1000000"))
+# Доля новых ссылок, которые фильтр ошибочно сочтет уже обработанными
+DEDUP_FALSE_POSITIVE_RATE = float(os.getenv("DEDUP_FALSE_POSITIVE_RATE", "0.001"))
+# Сколько последних публикаций дописывать в фильтр при запуске: столько их может
+# быть сделано без сохранения фильтра (например, функцией-вебхуком)
+DEDUP_RECENT_LINKS = int(os.getenv("DEDUP_RECENT_LINKS", "10000"))
+
+# Журнал опубликованных новостей для STORAGE_BACKEND=json
+JOURNAL_FSYNC_BATCH = int(os.getenv("JOURNAL_FSYNC_BATCH", "10"))  # fsync после стольких записей
+JOURNAL_FSYNC_INTERVAL = float(os.getenv("JOURNAL_FSYNC_INTERVAL", "1.0"))  # но не позже стольких секунд после записи
+JOURNAL_COMPACT_LINES = int(os.getenv("JOURNAL_COMPACT_LINES", "1000"))  # свертка в снимок после стольких записей
+
+# Как часто сохранять счетчики статистики на диск (в секундах)
+STATS_FLUSH_INTERVAL = int(os.getenv("STATS_FLUSH_INTERVAL", "60"))
+
+# Склейка почти одинаковых новостей разных источников (MinHash + LSH по заголовкам)
+NEAR_DUPLICATES_ENABLED = os.getenv("NEAR_DUPLICATES_ENABLED", "true").lower() in ("1", "true", "yes")
+NEAR_DUPLICATES_THRESHOLD = float(os.getenv("NEAR_DUPLICATES_THRESHOLD", "0.8"))  # сходство Жаккара токенов заголовков
+NEAR_DUPLICATES_WINDOW_HOURS = float(os.getenv("NEAR_DUPLICATES_WINDOW_HOURS", "48"))  # с чем сравнивать
+NEAR_DUPLICATES_BANDS = int(os.getenv("NEAR_DUPLICATES_BANDS", "16"))
+NEAR_DUPLICATES_ROWS = int(os.getenv("NEAR_DUPLICATES_ROWS", "2"))
+
+# Лимиты отправки сообщений в Telegram
+TELEGRAM_GLOBAL_MESSAGES_PER_SECOND = float(os.getenv("TELEGRAM_GLOBAL_MESSAGES_PER_SECOND", "30"))
+TELEGRAM_CHAT_MESSAGES_PER_SECOND = float(os.getenv("TELEGRAM_CHAT_MESSAGES_PER_SECOND", "1"))
+TELEGRAM_GROUP_MESSAGES_PER_MINUTE = float(os.getenv("TELEGRAM_GROUP_MESSAGES_PER_MINUTE", "20"))  # группы и каналы
+TELEGRAM_EDITS_PER_SECOND = float(os.getenv("TELEGRAM_EDITS_PER_SECOND", "1"))  # правки сообщений в одном чате
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "5"))
+SEND_RETRY_BACKOFF = float(os.getenv("SEND_RETRY_BACKOFF", "1.0"))  # секунд, удваивается с каждой попыткой
+
+# Дайджест модерации: до стольких новостей в одном сообщении (0 или 1 - по сообщению на новость)
+MODERATION_DIGEST_SIZE = int(os.getenv("MODERATION_DIGEST_SIZE", "0"))
+
+# Сколько обновлений (нажатий, команд) обрабатывается одновременно
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+
+# Получение обновлений: polling (long polling) или webhook (встроенный HTTP-сервер)
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # публичный адрес, например https://bot.example.com
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+# Telegram передает его в заголовке X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN", "")
@@ -6,6 +6,7 @@ Netlify Function для запуска Telegram бота
 
 import sys
 import os
+import hmac
 import json
 import logging
 from datetime import datetime
@@ -14,8 +15,42 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def handle_webhook(event):
+    """Обрабатывает обновление Telegram, пришедшее POST-запросом (BOT_MODE=webhook)"""
+    secret_token = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    received_token = headers.get('x-telegram-bot-api-secret-token', '')
+    
+    # Без совпадающего секрета запрос мог прийти не от Telegram
+    if not secret_token or not hmac.compare_digest(received_token, secret_token):
+        logger.warning("Отклонено обновление с неверным секретным токеном")
+        return {'statusCode': 403, 'body': json.dumps({'error': 'Invalid secret token'})}
+    
+    try:
+        update = json.loads(event.get('body') or '{}')
+    except ValueError:
+        return {'statusCode': 400, 'body': json.dumps({'error': 'Invalid JSON'})}
+    
+    src_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+    sys.path.insert(0, src_path)
+    from telegram_bot import TelegramNewsBot
+    import asyncio
+    
+    # Для одного нажатия не нужны парсер источников и индекс всех ссылок
+    bot = TelegramNewsBot(updates_only=True)
+    asyncio.run(bot.process_webhook_update(update))
+    return {'statusCode': 200, 'body': json.dumps({'ok': True})}
+
 def handler(event, context):
     """Основной обработчик Netlify Function"""
+    if (event or {}).get('httpMethod') == 'POST':
+        try:
+            return handle_webhook(event)
+        except Exception as e:
+            logger.error(f"❌ Ошибка при обработке обновления: {e}")
+            # 200, чтобы Telegram не повторял обновление, которое не удается обработать
+            return {'statusCode': 200, 'body': json.dumps({'ok': False})}
+    
     try:
         logger.info("=== ЗАПУСК NETLIFY FUNCTION ===")
         
@@ -62,8 +97,8 @@ def handler(event, context):
             from telegram_bot import TelegramNewsBot
             logger.info("✅ TelegramNewsBot импортирован успешно")
             
-            # Создаем бота
-            bot = TelegramNewsBot()
+            # Создаем бота; для проверки не нужны парсер источников и индекс ссылок
+            bot = TelegramNewsBot(updates_only=True)
             logger.info("✅ Бот создан успешно")
             
             # Отправляем тестовое сообщение
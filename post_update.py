@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Отправляет поддельное обновление Telegram на вебхук бота для локальной проверки
+
+Примеры:
+    python post_update.py --command /status
+    python post_update.py --callback approve_12
+    python post_update.py --url http://localhost:8888/.netlify/functions/bot --callback reject_3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from config import MODERATION_GROUP_ID, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN
+
+def build_update(command: str = None, callback: str = None) -> dict:
+    """Собирает обновление с командой или нажатием кнопки от имени тестового модератора"""
+    user = {'id': 1, 'is_bot': False, 'first_name': 'Тестовый модератор'}
+    chat = {'id': int(MODERATION_GROUP_ID), 'type': 'supergroup', 'title': 'Модерация'}
+    message = {'message_id': 1, 'date': int(time.time()), 'chat': chat, 'from': user}
+    update = {'update_id': random.randint(1, 2 ** 31)}
+
+    if callback:
+        message['text'] = 'Новая новость для модерации'
+        update['callback_query'] = {
+            'id': str(random.randint(1, 2 ** 31)),
+            'from': user,
+            'chat_instance': '1',
+            'message': message,
+            'data': callback
+        }
+    else:
+        message['text'] = command
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command.split()[0])}]
+        update['message'] = message
+    return update
+
+def main():
+    parser = argparse.ArgumentParser(description='Отправка тестового обновления на вебхук бота')
+    parser.add_argument('--url', default=f"http://localhost:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+    parser.add_argument('--secret', default=WEBHOOK_SECRET_TOKEN)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--command', help='команда, например /status')
+    group.add_argument('--callback', help='данные кнопки, например approve_12')
+    args = parser.parse_args()
+
+    update = build_update(args.command, args.callback)
+    started = time.perf_counter()
+    response = requests.post(
+        args.url,
+        json=update,
+        headers={'X-Telegram-Bot-Api-Secret-Token': args.secret},
+        timeout=30
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"{response.status_code} за {elapsed_ms:.0f} мс: {response.text[:200]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from storage import NewsStorage, PENDING, pending_status
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+class AsyncStorage:
+    """Асинхронный фасад хранилища для обработчиков Telegram.
+    
+    Дисковые операции выполняются в отдельном потоке, а не в цикле событий.
+    Поток один: JSON-хранилище держит данные в словарях, а у SQLite одно соединение.
+    Изменения одного файла (таблицы) сериализуются asyncio-блокировкой, чтобы
+    одновременные нажатия модераторов не теряли обновления друг друга.
+    """
+    
+    RESOURCES = ('pending', 'published', 'statistics')
+    
+    def __init__(self, storage: NewsStorage):
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage')
+        # Блокировки создаются в работающем цикле событий
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    def lock(self, resource: str) -> asyncio.Lock:
+        """Блокировка изменений файла (таблицы) resource"""
+        if resource not in self._locks:
+            self._locks[resource] = asyncio.Lock()
+        return self._locks[resource]
+    
+    async def run(self, func, *args):
+        """Выполняет операцию хранилища в потоке ввода-вывода"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+    
+    async def write(self, resource: str, func, *args):
+        """Выполняет изменение resource под его блокировкой"""
+        async with self.lock(resource):
+            return await self.run(func, *args)
+    
+    # Новости на модерации
+    
+    async def load_pending(self) -> List[Dict]:
+        return await self.run(self.storage.load_pending)
+    
+    async def get_pending(self, news_id: int) -> Optional[Dict]:
+        return await self.run(self.storage.get_pending, news_id)
+    
+    async def count_pending(self) -> int:
+        return await self.run(self.storage.count_pending)
+    
+    async def reserve_pending_id(self) -> int:
+        return await self.write('pending', self.storage.reserve_pending_id)
+    
+    async def add_pending(self, news: Dict):
+        await self.write('pending', self.storage.add_pending, news)
+    
+    async def update_pending(self, news: Dict):
+        await self.write('pending', self.storage.update_pending, news)
+    
+    async def remove_pending(self, news_id: int):
+        await self.write('pending', self.storage.remove_pending, news_id)
+    
+    async def take_pending(self, news_id: int, status: Optional[str] = PENDING) -> Optional[Dict]:
+        """Атомарно забирает новость с модерации, если она в статусе status (None - в любом);
+        повторный вызов вернет None"""
+        def take():
+            news = self.storage.get_pending(news_id)
+            if news is None or (status is not None and pending_status(news) != status):
+                return None
+            self.storage.remove_pending(news_id)
+            return news
+        return await self.write('pending', take)
+    
+    async def modify_pending(self, news_id: int, change: Callable[[Dict], Optional[bool]]) -> Optional[Dict]:
+        """Атомарно изменяет новость на модерации: прочитать, изменить и записать.
+        
+        change возвращает False, если менять новость не нужно; тогда результат None.
+        """
+        def modify():
+            news = self.storage.get_pending(news_id)
+            if news is None or change(news) is False:
+                return None
+            self.storage.update_pending(news)
+            return news
+        return await self.write('pending', modify)
+    
+    async def transition_pending(self, news_id: int, current: str, target: str) -> Optional[Dict]:
+        """Переводит новость из статуса current в target; None, если статус уже другой"""
+        def change(news: Dict) -> bool:
+            if pending_status(news) != current:
+                return False
+            news['status'] = target
+            return True
+        return await self.modify_pending(news_id, change)
+    
+    # Опубликованные новости
+    
+    async def count_published(self) -> int:
+        return await self.run(self.storage.count_published)
+    
+    async def published_since(self, since: datetime) -> List[Dict]:
+        return await self.run(self.storage.published_since, since)
+    
+    async def add_published(self, news: Dict):
+        await self.write('published', self.storage.add_published, news)
+    
+    # Статистика
+    
+    async def load_statistics(self) -> Dict:
+        return await self.run(self.storage.load_statistics)
+    
+    async def save_statistics(self, stats: Dict):
+        await self.write('statistics', self.storage.save_statistics, stats)
+    
+    async def close(self):
+        """Закрывает хранилище после завершения уже поставленных операций"""
+        await self.run(self.storage.close)
+        self._executor.shutdown(wait=True)
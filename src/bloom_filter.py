@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import math
+import os
+import struct
+from typing import Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """Фильтр Блума: компактное множество с заданной вероятностью ложных срабатываний.
+
+    Ложноотрицательных ответов не бывает: добавленный элемент всегда найдется.
+    """
+
+    MAGIC = b'TSBF'
+    VERSION = 1
+    # magic, версия, емкость, число бит, число хеш-функций, число элементов
+    HEADER = struct.Struct('<4sBQQBQ')
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        """Позиции бит элемента (двойное хеширование по Кирш-Митценмахеру)"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Добавляет элемент; False, если он (вероятно) уже был"""
+        added = False
+        bits = self._bits
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    @property
+    def size_bytes(self) -> int:
+        """Размер битового массива в байтах"""
+        return len(self._bits)
+
+    def save(self, path: str):
+        """Атомарно сохраняет фильтр в двоичный файл"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.VERSION, self.capacity, self.num_bits, self.num_hashes, self.count
+            ))
+            f.write(self._bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['BloomFilter']:
+        """Загружает фильтр из файла; None, если файла нет или он поврежден"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(cls.HEADER.size)
+                magic, version, capacity, num_bits, num_hashes, count = cls.HEADER.unpack(header)
+                if magic != cls.MAGIC or version != cls.VERSION:
+                    raise ValueError("неизвестный формат файла")
+                bits = bytearray(f.read())
+            if len(bits) != (num_bits + 7) // 8:
+                raise ValueError("неверный размер битового массива")
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке фильтра ссылок {path}: {e}")
+            return None
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.count = count
+        bloom._bits = bits
+        return bloom
@@ -0,0 +1,134 @@
+import io
+import json
+import logging
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+
+def _parse_date(value: Optional[str]) -> Optional[str]:
+    """Приводит дату из RSS (RFC 822) или Atom (ISO 8601) к ISO-формату"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+    except ValueError:
+        return None
+
+def _text(elem, *paths) -> Optional[str]:
+    """Возвращает текст первого найденного дочернего элемента"""
+    for path in paths:
+        value = elem.findtext(path)
+        if value and value.strip():
+            return value.strip()
+    return None
+
+def _rss_entry(item) -> Dict:
+    """Извлекает запись из элемента <item> RSS 2.0 / RSS 1.0"""
+    return {
+        'title': _text(item, 'title', RSS1_NS + 'title'),
+        'link': _text(item, 'link', RSS1_NS + 'link'),
+        'published': _parse_date(_text(item, 'pubDate', DC_NS + 'date'))
+    }
+
+def _atom_entry(entry) -> Dict:
+    """Извлекает запись из элемента <entry> Atom"""
+    link = None
+    for link_elem in entry.iter(ATOM_NS + 'link'):
+        if link_elem.get('rel', 'alternate') == 'alternate' and link_elem.get('href'):
+            link = link_elem.get('href')
+            break
+    return {
+        'title': _text(entry, ATOM_NS + 'title'),
+        'link': link,
+        'published': _parse_date(_text(entry, ATOM_NS + 'published', ATOM_NS + 'updated'))
+    }
+
+def parse_feed(content: bytes) -> Iterator[Dict]:
+    """Потоково разбирает RSS/Atom и выдает записи по одной, не держа дерево целиком"""
+    for _, elem in ET.iterparse(io.BytesIO(content), events=('end',)):
+        if elem.tag in ('item', RSS1_NS + 'item'):
+            yield _rss_entry(elem)
+            elem.clear()
+        elif elem.tag == ATOM_NS + 'entry':
+            yield _atom_entry(elem)
+            elem.clear()
+
+class FeedRegistry:
+    """Постоянный реестр найденных RSS/Atom-лент для источников"""
+
+    def __init__(self, path: str, rediscovery_hours: float):
+        self.path = path
+        self.rediscovery_seconds = rediscovery_hours * 3600
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        """Загружает реестр лент из файла"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Ошибка при загрузке реестра лент: {e}")
+        return {}
+
+    def get(self, source_url: str) -> Optional[str]:
+        """Возвращает URL ленты источника, если она известна"""
+        with self._lock:
+            return self._entries.get(source_url, {}).get('feed_url')
+
+    def needs_discovery(self, source_url: str) -> bool:
+        """Проверяет, нужно ли искать ленту на странице источника"""
+        with self._lock:
+            entry = self._entries.get(source_url)
+        if entry is None:
+            return True
+        if entry.get('feed_url'):
+            return False
+        return time.time() - entry.get('checked_at', 0) >= self.rediscovery_seconds
+
+    def remember(self, source_url: str, feed_url: Optional[str]):
+        """Запоминает результат поиска ленты (None - ленты нет)"""
+        with self._lock:
+            self._entries[source_url] = {'feed_url': feed_url, 'checked_at': time.time()}
+            self._dirty = True
+
+    def forget(self, source_url: str):
+        """Отказывается от ленты, которая перестала работать"""
+        self.remember(source_url, None)
+
+    def save(self):
+        """Атомарно сохраняет реестр на диск, если он изменился"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении реестра лент: {e}")
+            with self._lock:
+                self._dirty = True
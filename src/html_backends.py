@@ -0,0 +1,292 @@
+import re
+import logging
+import threading
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Tuple
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import EncodingDetector
+
+try:
+    from lxml import etree
+except ImportError:  # lxml необязателен, без него используется html.parser
+    etree = None
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+ARTICLE_CLASS_RE = re.compile(r'(article|news|post|item|card)')
+NON_EMPTY_RE = re.compile(r'.+')
+
+ARTICLE_TAGS = ('article', 'div')
+HEADLINE_TAGS = ('h1', 'h2', 'h3', 'h4')
+TITLE_TAGS = ('h1', 'h2', 'h3', 'h4', 'a')
+PARENT_TAGS = ('article', 'div', 'a')
+
+# Типы RSS/Atom-лент в <link rel="alternate">
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml')
+
+# Теги, строки внутри которых BeautifulSoup не включает в get_text()
+NON_TEXT_CONTAINERS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+# Частичный разбор: в дерево попадают только контейнеры статей (вместе с содержимым)
+ARTICLE_STRAINER = SoupStrainer(list(ARTICLE_TAGS), class_=ARTICLE_CLASS_RE)
+FEED_LINK_STRAINER = SoupStrainer('link')
+
+# tracemalloc глобален для процесса, поэтому замеры выполняются по одному
+_profile_lock = threading.Lock()
+
+class SoupDocument:
+    """Документ BeautifulSoup с ленивым построением деревьев.
+
+    В частичном режиме сначала строятся только контейнеры статей; полное дерево
+    нужно лишь для запасного поиска по заголовкам, когда контейнеров нет.
+    """
+
+    def __init__(self, content: bytes, features: str, partial: bool):
+        self.content = content
+        self.features = features
+        self.partial = partial
+        self._articles_soup = None
+        self._full_soup = None
+
+    @property
+    def full(self):
+        """Полное дерево документа"""
+        if self._full_soup is None:
+            self._full_soup = BeautifulSoup(self.content, self.features)
+        return self._full_soup
+
+    @property
+    def articles(self):
+        """Дерево, достаточное для поиска контейнеров статей"""
+        if not self.partial or self._full_soup is not None:
+            return self.full
+        if self._articles_soup is None:
+            self._articles_soup = BeautifulSoup(self.content, self.features, parse_only=ARTICLE_STRAINER)
+        return self._articles_soup
+
+    def feed_links(self):
+        """Теги <link>, среди которых ищется RSS/Atom-лента"""
+        if not self.partial or self._full_soup is not None:
+            return self.full.find_all('link')
+        return BeautifulSoup(self.content, self.features, parse_only=FEED_LINK_STRAINER).find_all('link')
+
+class SoupBackend:
+    """Разбор страницы через BeautifulSoup с указанным построителем дерева"""
+
+    def __init__(self, features: str, partial: bool = True):
+        self.name = features
+        self.features = features
+        self.partial = partial
+        # Если на прошлой странице контейнеров статей не было, частичный разбор
+        # только добавил бы второй проход, поэтому сразу строим полное дерево
+        self._containers_found = True
+
+    def parse(self, content: bytes) -> SoupDocument:
+        """Готовит документ; деревья строятся по мере необходимости"""
+        return SoupDocument(content, self.features, self.partial and self._containers_found)
+
+    def find_articles(self, document: SoupDocument) -> List:
+        """Находит статьи на странице"""
+        # Ищем статьи в разных секциях
+        articles = document.articles.find_all(list(ARTICLE_TAGS), class_=ARTICLE_CLASS_RE)
+        self._containers_found = bool(articles)
+
+        # Если не нашли по классам, ищем по структуре
+        if not articles:
+            headlines = document.full.find_all(list(HEADLINE_TAGS), string=NON_EMPTY_RE)
+            for headline in headlines:
+                parent = headline.find_parent(list(PARENT_TAGS))
+                if parent:
+                    articles.append(parent)
+
+        return articles
+
+    def find_feed_url(self, document: SoupDocument) -> Optional[str]:
+        """Ищет ссылку на RSS/Atom-ленту в <link rel="alternate">"""
+        for link in document.feed_links():
+            if ('alternate' in (link.get('rel') or [])
+                    and (link.get('type') or '').lower() in FEED_TYPES
+                    and link.get('href')):
+                return link.get('href')
+        return None
+
+    def measure(self, content: bytes) -> Dict[str, float]:
+        """Замеряет время и пиковую память полного и частичного разбора страницы"""
+        result = {}
+        with _profile_lock:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            try:
+                for mode, parse_only in (('full', None), ('partial', ARTICLE_STRAINER)):
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    started = time.perf_counter()
+                    soup = BeautifulSoup(content, self.features, parse_only=parse_only)
+                    soup.find_all(list(ARTICLE_TAGS), class_=ARTICLE_CLASS_RE)
+                    result[f'{mode}_seconds'] = time.perf_counter() - started
+                    result[f'{mode}_peak_bytes'] = tracemalloc.get_traced_memory()[1] - baseline
+                    del soup
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+        return result
+
+    def extract(self, article) -> Optional[Tuple[str, Optional[str]]]:
+        """Возвращает заголовок и ссылку статьи"""
+        # Ищем заголовок
+        title_elem = article.find(list(TITLE_TAGS), string=NON_EMPTY_RE)
+        if not title_elem:
+            return None
+
+        title = title_elem.get_text(strip=True)
+
+        # Ищем ссылку
+        link_elem = article.find('a', href=True)
+        if not link_elem:
+            if title_elem.name == 'a' and title_elem.get('href'):
+                return title, title_elem.get('href')
+            return title, None
+        return title, link_elem.get('href')
+
+class LxmlBackend:
+    """Быстрый путь на lxml без построения дерева BeautifulSoup.
+
+    Повторяет семантику поиска SoupBackend('lxml'): то же дерево libxml2,
+    те же правила для .string и get_text(strip=True).
+    """
+
+    name = 'lxml-fast'
+
+    def parse(self, content: bytes):
+        """Строит дерево документа с той же кодировкой, что выбрал бы BeautifulSoup"""
+        detector = EncodingDetector(content, is_html=True)
+        encoding = next(iter(detector.encodings), None)
+        parser = etree.HTMLParser(encoding=encoding, recover=True)
+        try:
+            return etree.fromstring(detector.markup, parser)
+        except etree.XMLSyntaxError:
+            # Пустой документ
+            return None
+
+    def find_articles(self, root) -> Iterator:
+        """Лениво находит статьи на странице в порядке документа"""
+        if root is None:
+            return
+
+        found = False
+        for elem in root.iter(*ARTICLE_TAGS):
+            if ARTICLE_CLASS_RE.search(elem.get('class') or ''):
+                found = True
+                yield elem
+
+        if not found:
+            for headline in root.iter(*HEADLINE_TAGS):
+                if not self._string_matches(headline):
+                    continue
+                parent = next(headline.iterancestors(*PARENT_TAGS), None)
+                if parent is not None:
+                    yield parent
+
+    def find_feed_url(self, root) -> Optional[str]:
+        """Ищет ссылку на RSS/Atom-ленту в <link rel="alternate">"""
+        if root is None:
+            return None
+        for link in root.iter('link'):
+            if ('alternate' in (link.get('rel') or '').lower().split()
+                    and (link.get('type') or '').lower() in FEED_TYPES
+                    and link.get('href')):
+                return link.get('href')
+        return None
+
+    def extract(self, article) -> Optional[Tuple[str, Optional[str]]]:
+        """Возвращает заголовок и ссылку статьи"""
+        title_elem = None
+        link = None
+        for elem in article.iterdescendants(*TITLE_TAGS):
+            if title_elem is None and self._string_matches(elem):
+                title_elem = elem
+            if link is None and elem.tag == 'a' and 'href' in elem.attrib:
+                link = elem.get('href')
+            if title_elem is not None and link is not None:
+                break
+
+        if title_elem is None:
+            return None
+        return self._get_text(title_elem), link
+
+    @staticmethod
+    def _children(elem) -> list:
+        """Дочерние узлы в терминах BeautifulSoup: текст, элементы и их хвосты"""
+        children = []
+        if elem.text:
+            children.append(elem.text)
+        for child in elem:
+            children.append(child)
+            if child.tail:
+                children.append(child.tail)
+        return children
+
+    def _string(self, elem) -> Optional[str]:
+        """Аналог Tag.string: единственная строка внутри элемента"""
+        while True:
+            children = self._children(elem)
+            if len(children) != 1:
+                return None
+            child = children[0]
+            if isinstance(child, str):
+                return child
+            if not isinstance(child.tag, str):
+                # Комментарий в BeautifulSoup тоже строка
+                return child.text
+            elem = child
+
+    def _string_matches(self, elem) -> bool:
+        """Аналог фильтра string=re.compile(r'.+')"""
+        string = self._string(elem)
+        return string is not None and NON_EMPTY_RE.search(string) is not None
+
+    def _get_text(self, elem) -> str:
+        """Аналог get_text(strip=True)"""
+        if any(ancestor.tag in NON_TEXT_CONTAINERS for ancestor in elem.iterancestors()):
+            return ''
+
+        parts = []
+
+        def walk(node):
+            if node.tag in NON_TEXT_CONTAINERS:
+                return
+            if node.text:
+                parts.append(node.text)
+            for child in node:
+                if isinstance(child.tag, str):
+                    walk(child)
+                if child.tail:
+                    parts.append(child.tail)
+
+        walk(elem)
+        return ''.join(part.strip() for part in parts)
+
+def get_backend(name: str = 'html.parser', partial: bool = True):
+    """Возвращает бэкенд разбора HTML по имени; 'auto' выбирает самый быстрый доступный.
+
+    partial включает частичный разбор для бэкендов на BeautifulSoup. Бэкенды
+    на lxml по-своему достраивают некорректную разметку (незакрытые теги),
+    поэтому заголовки таких страниц могут отличаться от html.parser.
+    """
+    if name == 'auto':
+        name = 'lxml-fast' if etree is not None else 'html.parser'
+
+    if name == 'lxml-fast':
+        if etree is None:
+            logger.warning("lxml не установлен, используем html.parser")
+            return SoupBackend('html.parser', partial)
+        return LxmlBackend()
+
+    if name == 'lxml' and etree is None:
+        logger.warning("lxml не установлен, используем html.parser")
+        return SoupBackend('html.parser', partial)
+
+    return SoupBackend(name, partial)
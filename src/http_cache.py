@@ -0,0 +1,88 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+class ValidatorCache:
+    """Постоянный кэш HTTP-валидаторов (ETag, Last-Modified, хэш содержимого) по URL"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        # Валидаторы, полученные в текущем цикле, но еще не подтвержденные
+        self._staged = {}
+        self._dirty = False
+    
+    def _load(self) -> Dict[str, Dict]:
+        """Загружает кэш валидаторов из файла"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Ошибка при загрузке кэша валидаторов: {e}")
+        return {}
+    
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        """Возвращает хэш тела ответа"""
+        return hashlib.sha256(content).hexdigest()
+    
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Возвращает заголовки условного запроса для URL"""
+        with self._lock:
+            entry = self._entries.get(url, {})
+        
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        """Проверяет, совпадает ли тело ответа с последним обработанным"""
+        with self._lock:
+            return self._entries.get(url, {}).get('content_hash') == content_hash
+    
+    def stage(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str):
+        """Запоминает валидаторы ответа до подтверждения обработки результата"""
+        with self._lock:
+            self._staged[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'content_hash': content_hash
+            }
+    
+    def commit(self, url: str):
+        """Подтверждает валидаторы URL после того, как результат парсинга был использован"""
+        with self._lock:
+            entry = self._staged.pop(url, None)
+            if entry is not None and self._entries.get(url) != entry:
+                self._entries[url] = entry
+                self._dirty = True
+    
+    def save(self):
+        """Атомарно сохраняет кэш на диск, если он изменился"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении кэша валидаторов: {e}")
+            with self._lock:
+                self._dirty = True
@@ -0,0 +1,108 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from urllib3.util.request import make_headers
+
+from config import (
+    FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+    HTTP_RETRIES, HTTP_RETRY_BACKOFF, HTTP_MAX_RETRY_WAIT, HTTP_MAX_BODY_BYTES
+)
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+class ResponseTooLarge(requests.RequestException):
+    """Тело ответа превышает HTTP_MAX_BODY_BYTES"""
+
+class BoundedRetry(Retry):
+    """Повторы, которые ждут не дольше HTTP_MAX_RETRY_WAIT секунд перед каждой попыткой.
+
+    Retry-After сервера соблюдается, но не больше этого предела, иначе один
+    источник задерживал бы весь цикл проверки дольше FETCH_CYCLE_DEADLINE.
+    """
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_MAX_RETRY_WAIT)
+
+    def get_backoff_time(self) -> float:
+        return min(super().get_backoff_time(), HTTP_MAX_RETRY_WAIT)
+
+def create_session() -> requests.Session:
+    """Создает сессию с настроенным пулом соединений, повторами и сжатием"""
+    session = requests.Session()
+
+    retry = BoundedRetry(
+        total=HTTP_RETRIES,
+        # Таймаут чтения не повторяем: запрос уже занял FETCH_READ_TIMEOUT секунд
+        read=0,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # gzip/deflate всегда, br и zstd - если установлены соответствующие модули
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding']
+    })
+    return session
+
+def get_session() -> requests.Session:
+    """Возвращает общую для всех парсеров сессию; соединения живут между циклами"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+def fetch(session: requests.Session, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    """Загружает URL потоково и прерывает загрузку, если тело больше HTTP_MAX_BODY_BYTES"""
+    response = session.get(
+        url,
+        headers=headers,
+        timeout=(FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT),
+        stream=True
+    )
+    try:
+        content_length = response.headers.get('Content-Length', '')
+        if content_length.isdigit() and int(content_length) > HTTP_MAX_BODY_BYTES:
+            raise ResponseTooLarge(f"{url}: Content-Length {content_length} больше {HTTP_MAX_BODY_BYTES} байт")
+
+        # Считаем уже распакованные байты, чтобы сжатая страница не обошла лимит
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > HTTP_MAX_BODY_BYTES:
+                raise ResponseTooLarge(f"{url}: тело ответа больше {HTTP_MAX_BODY_BYTES} байт")
+            chunks.append(chunk)
+    except Exception:
+        # Недочитанное соединение нельзя вернуть в пул
+        response.close()
+        raise
+
+    response._content = b''.join(chunks)
+    return response
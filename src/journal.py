@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+class Journal:
+    """Журнал изменений поверх JSON-снимка.
+    
+    Каждое изменение дописывается одной строкой JSONL; fsync выполняется пачками,
+    но не позже чем через fsync_interval секунд после записи.
+    Когда журнал разрастается, он атомарно переименовывается и в фоне сворачивается
+    в новый снимок. Функция apply(items, records) применяет записи к снимку и должна
+    быть идемпотентной: после сбоя посреди свертки записи могут примениться повторно.
+    С read_only=True журнал только читается: прерванная свертка не завершается.
+    """
+    
+    def __init__(self, snapshot_path: str, apply: Callable[[List, List[Dict]], List],
+                 fsync_batch: int = 10, fsync_interval: float = 1.0, compact_lines: int = 1000,
+                 read_only: bool = False):
+        self.snapshot_path = snapshot_path
+        self.path = os.path.splitext(snapshot_path)[0] + '.jsonl'
+        self.rotated_path = self.path + '.1'
+        self.apply = apply
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.compact_lines = compact_lines
+        
+        self._lock = threading.RLock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer = None
+        self._compaction = None
+        
+        if not read_only:
+            # Свертка, прерванная при прошлом запуске
+            if os.path.exists(self.rotated_path):
+                self._fold()
+            self._terminate_partial_line()
+        self._lines = len(self._read_records(self.path))
+    
+    def _terminate_partial_line(self):
+        """Закрывает строку, недописанную при сбое, чтобы новые записи не склеились с ней"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+    
+    def _read_snapshot(self) -> Optional[List]:
+        """Читает снимок; None, если он поврежден"""
+        if not os.path.exists(self.snapshot_path):
+            return []
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке {self.snapshot_path}: {e}")
+            return None
+    
+    def _read_records(self, path: str) -> List[Dict]:
+        """Читает записи журнала, пропуская недописанную при сбое строку"""
+        if not os.path.exists(path):
+            return []
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Пропущена поврежденная строка журнала {path}")
+        return records
+    
+    def exists(self) -> bool:
+        """Проверяет, есть ли на диске снимок или журнал"""
+        return any(os.path.exists(path) for path in (self.snapshot_path, self.path, self.rotated_path))
+    
+    def load(self) -> List:
+        """Возвращает снимок с примененными записями журнала"""
+        with self._lock:
+            items = self._read_snapshot() or []
+            records = self._read_records(self.rotated_path) + self._read_records(self.path)
+        return self.apply(items, records)
+    
+    def append(self, record: Dict):
+        """Дописывает запись в журнал"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            # Запись уходит в ОС сразу; на диск - пачками
+            self._file.flush()
+            self._unsynced += 1
+            self._lines += 1
+            if (self._unsynced >= self.fsync_batch
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            elif self._sync_timer is None:
+                # Без следующей записи пачка иначе осталась бы без fsync
+                self._sync_timer = threading.Timer(self.fsync_interval, self._timed_sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+            need_compaction = self._lines >= self.compact_lines
+        
+        if need_compaction:
+            self.compact()
+    
+    def _sync(self):
+        """Сбрасывает дописанные записи на диск"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def _timed_sync(self):
+        """Сбрасывает на диск записи, дождавшиеся fsync_interval"""
+        with self._lock:
+            self._sync_timer = None
+            try:
+                self._sync()
+            except Exception as e:
+                logger.error(f"Ошибка при сбросе журнала {self.path} на диск: {e}")
+    
+    def reset(self, items: List):
+        """Заменяет снимок целиком и очищает журнал"""
+        self._wait_compaction()
+        with self._lock:
+            self._write_snapshot(items)
+            self._close_file()
+            for path in (self.path, self.rotated_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._lines = 0
+    
+    def compact(self, wait: bool = False):
+        """Сворачивает журнал в снимок (в фоне, если wait=False)"""
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            # Прошлая свертка не удалась: ротированный журнал нельзя перезаписывать
+            if not self._lines or os.path.exists(self.rotated_path):
+                return
+            # Атомарная ротация: новые записи идут уже в свежий журнал
+            self._close_file()
+            os.replace(self.path, self.rotated_path)
+            self._lines = 0
+            self._compaction = threading.Thread(target=self._fold, name='journal-compaction', daemon=True)
+            self._compaction.start()
+        
+        if wait:
+            self._wait_compaction()
+    
+    def _fold(self):
+        """Применяет ротированный журнал к снимку и удаляет его"""
+        try:
+            with self._lock:
+                items = self._read_snapshot()
+            if items is None:
+                logger.error(f"Снимок {self.snapshot_path} поврежден, свертка журнала отложена")
+                return
+            items = self.apply(items, self._read_records(self.rotated_path))
+            
+            with self._lock:
+                self._write_snapshot(items)
+                os.remove(self.rotated_path)
+            logger.info(f"Журнал свернут в {self.snapshot_path}")
+        except Exception as e:
+            logger.error(f"Ошибка при свертке журнала {self.path}: {e}")
+    
+    def _write_snapshot(self, items: List):
+        """Атомарно перезаписывает снимок"""
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+    
+    def _wait_compaction(self):
+        compaction = self._compaction
+        if compaction is not None and compaction is not threading.current_thread():
+            compaction.join()
+    
+    def _close_file(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+    
+    def close(self):
+        """Сбрасывает журнал на диск и дожидается фоновой свертки"""
+        self._wait_compaction()
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self._close_file()
@@ -0,0 +1,71 @@
+import re
+from typing import Dict, FrozenSet, Iterable
+
+class KeywordMatcher:
+    """Однопроходный поиск ключевых слов по категориям.
+
+    Все ключевые слова собираются в префиксное дерево и компилируются в одно
+    регулярное выражение. Выражение проверяется в каждой позиции заголовка и
+    находит самое длинное слово, начинающееся в ней; категории всех более коротких
+    слов-префиксов заранее объединены с категориями длинного слова, поэтому
+    результат совпадает с проверкой `keyword in text` для каждого слова отдельно.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories = list(categories)
+        masks = {}
+        for bit, category in enumerate(self.categories):
+            for keyword in categories[category]:
+                if keyword:
+                    masks[keyword] = masks.get(keyword, 0) | (1 << bit)
+
+        trie = {}
+        for keyword in masks:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        # Категории слова включают категории всех слов, являющихся его префиксами
+        self._masks = {}
+        for keyword in masks:
+            mask = 0
+            for end in range(1, len(keyword) + 1):
+                mask |= masks.get(keyword[:end], 0)
+            self._masks[keyword] = mask
+
+        self._pattern = re.compile('(?=(' + self._trie_to_regex(trie) + '))') if trie else None
+
+    @classmethod
+    def _trie_to_regex(cls, node: dict) -> str:
+        """Преобразует префиксное дерево в регулярное выражение с жадными ветками"""
+        branches = [
+            re.escape(char) + cls._trie_to_regex(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Слово может закончиться здесь, но сначала пробуем более длинное
+            return '(?:' + body + ')?'
+        return body
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Возвращает категории, ключевые слова которых встречаются в тексте"""
+        if self._pattern is None:
+            return frozenset()
+
+        mask = 0
+        full_mask = (1 << len(self.categories)) - 1
+        for found in self._pattern.finditer(text):
+            keyword = found.group(1)
+            if keyword:
+                mask |= self._masks[keyword]
+                if mask == full_mask:
+                    break
+
+        return frozenset(
+            category for bit, category in enumerate(self.categories) if mask & (1 << bit)
+        )
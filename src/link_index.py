@@ -0,0 +1,90 @@
+import logging
+import threading
+from typing import Iterable, Optional
+from bloom_filter import BloomFilter
+from config import DEDUP_FILTER_FILE, DEDUP_FILTER_CAPACITY, DEDUP_FALSE_POSITIVE_RATE, DEDUP_RECENT_LINKS
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+class LinkIndex:
+    """Индекс уже обработанных ссылок (на модерации и опубликованных).
+    
+    Ссылки на модерации хранятся точно, вся история публикаций - в фильтре Блума,
+    поэтому новая ссылка с вероятностью DEDUP_FALSE_POSITIVE_RATE ошибочно
+    считается опубликованной. Сами записи сохраняет хранилище, индекс лишь
+    отражает их в памяти.
+    """
+    
+    def __init__(self, pending: Iterable[str] = (), history: Optional[BloomFilter] = None):
+        self._pending = set(pending)
+        self.history = history or BloomFilter(DEDUP_FILTER_CAPACITY, DEDUP_FALSE_POSITIVE_RATE)
+        self._dirty = False
+        # Циклы проверки могут сохранять фильтр одновременно
+        self._save_lock = threading.Lock()
+    
+    def __contains__(self, link: str) -> bool:
+        return link in self._pending or link in self.history
+    
+    def __len__(self) -> int:
+        return len(self._pending) + self.history.count
+    
+    def add(self, link: str):
+        """Отмечает ссылку как обработанную (новость ушла на модерацию)"""
+        self._pending.add(link)
+    
+    def discard(self, link: str):
+        """Убирает ссылку из индекса (новость снята с модерации без публикации)"""
+        self._pending.discard(link)
+    
+    def publish(self, link: str):
+        """Переносит ссылку из модерации в историю публикаций"""
+        self._pending.discard(link)
+        if self.history.add(link):
+            self._dirty = True
+    
+    def save(self, path: str = DEDUP_FILTER_FILE):
+        """Сохраняет фильтр истории, если он изменился"""
+        with self._save_lock:
+            if not self._dirty:
+                return
+            try:
+                self._dirty = False
+                self.history.save(path)
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Ошибка при сохранении фильтра ссылок: {e}")
+    
+    @classmethod
+    def load(cls, storage, path: str = DEDUP_FILTER_FILE) -> 'LinkIndex':
+        """Загружает индекс: фильтр из файла, недостающие ссылки - из хранилища"""
+        recent = storage.load_recent_published_links(DEDUP_RECENT_LINKS)
+        published_count = storage.count_published()
+        history = BloomFilter.load(path)
+        
+        # Фильтр догоняется по последним DEDUP_RECENT_LINKS публикациям (их могли
+        # сделать без сохранения фильтра); если отстал сильнее, переполнен или
+        # отсутствует - строим заново по всей истории
+        rebuild = (
+            history is None
+            or published_count - history.count > len(recent)
+            or published_count > history.capacity
+        )
+        if rebuild:
+            capacity = max(DEDUP_FILTER_CAPACITY, published_count * 2)
+            history = BloomFilter(capacity, DEDUP_FALSE_POSITIVE_RATE)
+            links = storage.iter_published_links()
+        else:
+            links = recent
+        
+        added = sum(history.add(link) for link in links)
+        
+        index = cls(storage.load_pending_links(), history)
+        index._dirty = rebuild or added > 0
+        if rebuild:
+            logger.info(
+                f"Фильтр ссылок построен заново: {history.count} ссылок, "
+                f"{history.size_bytes / 1024 / 1024:.1f} МБ"
+            )
+        index.save(path)
+        return index
@@ -0,0 +1,211 @@
+import hashlib
+import logging
+import random
+import re
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+')
+
+STOP_WORDS = frozenset((
+    # Русские
+    'и', 'в', 'во', 'на', 'с', 'со', 'по', 'к', 'ко', 'о', 'об', 'от', 'до', 'за', 'из', 'у',
+    'для', 'что', 'как', 'а', 'но', 'не', 'это', 'его', 'ее', 'их', 'же', 'ли', 'при', 'под',
+    # Английские
+    'the', 'a', 'an', 'of', 'to', 'in', 'on', 'for', 'and', 'or', 'with', 'by', 'at', 'from',
+    'is', 'are', 'as', 'its', 'be', 'has', 'have',
+))
+
+ENGLISH_SUFFIXES = ('ing', 'ed', 'es', 's')
+
+# Падежные и родовые окончания: "стартап" и "стартапа" дают один токен.
+# Сама основа не обрезается, поэтому названия и числа различаются
+RUSSIAN_SUFFIXES = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'иях', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ах', 'ях', 'ам', 'ям', 'ов', 'ев', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие',
+    'ую', 'юю', 'ом', 'ем', 'ия', 'ии', 'ию', 'ью',
+    'а', 'я', 'ы', 'и', 'у', 'ю', 'е', 'о', 'ь', 'й'
+)
+
+# Модуль для хешей перестановок MinHash (простое число Мерсенна 2^61 - 1)
+MERSENNE_PRIME = (1 << 61) - 1
+
+def title_tokens(title: str) -> frozenset:
+    """Нормализует заголовок: регистр, ё, стоп-слова и окончания (русские и английские)"""
+    tokens = set()
+    for word in WORD_RE.findall(title.lower().replace('ё', 'е')):
+        if word in STOP_WORDS:
+            continue
+        if word.isalpha():
+            for suffix in ENGLISH_SUFFIXES if word.isascii() else RUSSIAN_SUFFIXES:
+                if len(word) > len(suffix) + 3 and word.endswith(suffix):
+                    word = word[:-len(suffix)]
+                    break
+        tokens.add(word)
+    return frozenset(tokens)
+
+def add_duplicate(card: Dict, news: Dict):
+    """Добавляет похожую новость в карточку"""
+    card.setdefault('duplicates', []).append({
+        'title': news['title'],
+        'link': news['link'],
+        'source': news.get('source')
+    })
+
+class MinHasher:
+    """MinHash-сигнатуры множеств токенов"""
+    
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+    
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """Сигнатура множества: минимум каждой хеш-перестановки"""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+            for token in tokens
+        ]
+        if not hashes:
+            return (MERSENNE_PRIME,) * self.num_perm
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+def jaccard(first: frozenset, second: frozenset) -> float:
+    """Точное сходство Жаккара двух множеств токенов"""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+class LSHIndex:
+    """LSH-индекс сигнатур недавних новостей.
+    
+    Сигнатура режется на полосы; кандидатами считаются записи, совпавшие хотя бы
+    в одной полосе, так что поиск не перебирает все недавние записи. Кандидаты
+    проверяются точным сходством токенов: оценка по короткой сигнатуре слишком
+    груба для заголовков, которые отличаются одним названием или числом.
+    """
+    
+    def __init__(self, bands: int, rows: int, threshold: float, window_seconds: float):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self._buckets: Dict[Tuple, set] = {}
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        # Токены и источник записи для проверки кандидатов
+        self._entries: Dict[str, Tuple[frozenset, Optional[str]]] = {}
+        self._added = deque()
+    
+    def __len__(self) -> int:
+        return len(self._signatures)
+    
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield (band,) + signature[band * self.rows:(band + 1) * self.rows]
+    
+    def _expire(self, now: float):
+        """Удаляет записи старше окна"""
+        while self._added and now - self._added[0][0] > self.window_seconds:
+            _, key = self._added.popleft()
+            signature = self._signatures.pop(key, None)
+            if signature is None:
+                continue
+            del self._entries[key]
+            for band_key in self._band_keys(signature):
+                bucket = self._buckets.get(band_key)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[band_key]
+    
+    def add(self, key: str, signature: Tuple[int, ...], tokens: frozenset,
+            source: Optional[str] = None, added_at: Optional[float] = None):
+        """Добавляет сигнатуру записи"""
+        now = time.time()
+        self._expire(now)
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        self._entries[key] = (tokens, source)
+        self._added.append((added_at if added_at is not None else now, key))
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+    
+    def query(self, signature: Tuple[int, ...], tokens: frozenset,
+              source: Optional[str] = None, exclude: Optional[str] = None) -> Optional[str]:
+        """Возвращает самую похожую запись другого источника со сходством не ниже порога (кроме exclude)"""
+        self._expire(time.time())
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        candidates.discard(exclude)
+        
+        best_key, best_score = None, self.threshold
+        for key in candidates:
+            candidate_tokens, candidate_source = self._entries[key]
+            # Похожие заголовки одного сайта - разные новости
+            if source is not None and candidate_source == source:
+                continue
+            score = jaccard(tokens, candidate_tokens)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+class NearDuplicateDetector:
+    """Склеивает почти одинаковые новости разных источников в одну карточку"""
+    
+    def __init__(self, bands: int, rows: int, threshold: float, window_hours: float):
+        self.hasher = MinHasher(bands * rows)
+        self.index = LSHIndex(bands, rows, threshold, window_hours * 3600)
+    
+    def signature(self, news: Dict) -> Tuple[Tuple[int, ...], frozenset]:
+        """Сигнатура и токены заголовка новости"""
+        tokens = title_tokens(news['title'])
+        return self.hasher.signature(tokens), tokens
+    
+    def remember(self, news: Dict, added_at: Optional[float] = None):
+        """Запоминает отправленную на модерацию новость (после отправки или при запуске бота)"""
+        if news.get('link') and news.get('title'):
+            signature, tokens = self.signature(news)
+            self.index.add(news['link'], signature, tokens, news.get('source'), added_at)
+    
+    def cluster(self, news_list: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, str]]]:
+        """Делит новости на карточки и дубли.
+        
+        Дубль новости из этой же пачки попадает в поле 'duplicates' ее карточки;
+        дубль ранее отправленной новости возвращается парой (новость, ссылка карточки).
+        Карточки пачки в общий индекс не попадают: их запоминает remember после отправки.
+        Склеиваются только новости разных источников.
+        """
+        batch = LSHIndex(self.index.bands, self.index.rows, self.index.threshold, self.index.window_seconds)
+        cards = {}
+        result = []
+        earlier = []
+        for news in news_list:
+            signature, tokens = self.signature(news)
+            source = news.get('source')
+            match = self.index.query(signature, tokens, source, exclude=news['link'])
+            if match is not None:
+                earlier.append((news, match))
+                logger.info(f"ПОХОЖАЯ НА ОТПРАВЛЕННУЮ: {news['title']}")
+                continue
+            
+            match = batch.query(signature, tokens, source)
+            if match is None:
+                batch.add(news['link'], signature, tokens, source)
+                cards[news['link']] = news
+                result.append(news)
+            else:
+                add_duplicate(cards[match], news)
+                logger.info(f"ПОХОЖАЯ НОВОСТЬ: {news['title']} -> {cards[match]['title']}")
+        return result, earlier
@@ -1,89 +1,243 @@
-import requests
-from bs4 import BeautifulSoup
-import re
+import asyncio
 import logging
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Container, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
 from abc import ABC, abstractmethod
-from config import TECH_KEYWORDS
+from config import (
+    TECH_KEYWORDS, KEYWORD_CATEGORIES, NEWS_SOURCES, FETCH_CYCLE_DEADLINE, FETCH_MAX_WORKERS, HTTP_CACHE_FILE, HTML_PARSER_BACKEND,
+    FEED_MODE, FEEDS_FILE, FEED_REDISCOVERY_HOURS, EARLY_STOP_KNOWN_LINKS,
+    HTML_PARTIAL_PARSING, PARSE_PROFILE, CHECK_INTERVAL,
+    POLL_SCHEDULE_FILE, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_JITTER,
+    HEALTH_WINDOW, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BASE_BACKOFF, CIRCUIT_MAX_BACKOFF
+)
+from http_cache import ValidatorCache
+from http_client import fetch, get_session
+from feed_parser import FeedRegistry, parse_feed
+from html_backends import get_backend
+from keyword_matcher import KeywordMatcher
+from poll_scheduler import PollScheduler
+from source_health import SourceHealth
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Заголовки приводятся к нижнему регистру, поэтому общие ключевые слова тоже.
+# Слова категорий используются как есть, как и раньше.
+KEYWORD_MATCHER = KeywordMatcher({
+    **KEYWORD_CATEGORIES,
+    'keywords': [keyword.lower() for keyword in TECH_KEYWORDS]
+})
+
 class BaseNewsParser(ABC):
     """Базовый класс для парсинга новостей"""
     
     def __init__(self, base_url: str, source_name: str):
         self.base_url = base_url
         self.source_name = source_name
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Общая для всех источников сессия: один пул соединений с keep-alive
+        self.session = get_session()
+        # Кэш валидаторов, реестр лент и здоровье источников назначаются из NewsParser
+        self.validator_cache = None
+        self.feed_registry = None
+        self.health = None
+        self._staged_urls = []
+        # Бэкенд разбора HTML (lxml без BeautifulSoup, если доступен)
+        self.backend = get_backend(HTML_PARSER_BACKEND, HTML_PARTIAL_PARSING)
     
-    def parse_news(self) -> List[Dict]:
-        """Основной метод парсинга новостей"""
+    def parse_news(self, seen_links: Optional[Container[str]] = None) -> List[Dict]:
+        """Основной метод парсинга новостей.
+        
+        Если передан seen_links, разбор останавливается после EARLY_STOP_KNOWN_LINKS
+        уже известных ссылок подряд: страницы и ленты упорядочены от новых к старым.
+        Ошибка загрузки учитывается в здоровье источника и пробрасывается вызывающему,
+        чтобы неудачный опрос не принимался за опрос без новостей.
+        """
+        self._staged_urls = []
+        started = time.monotonic()
         try:
-            logger.info(f"Парсинг новостей с {self.base_url}")
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            news_items = []
-            
-            # Ищем статьи
-            articles = self._find_articles(soup)
-            
-            for article in articles:
-                try:
-                    news_item = self._extract_news_item(article)
-                    if news_item and self.is_tech_news(news_item['title']):
-                        news_items.append(news_item)
-                except Exception as e:
-                    logger.warning(f"Ошибка при обработке статьи: {e}")
-                    continue
-            
-            logger.info(f"Найдено {len(news_items)} технологических новостей с {self.source_name}")
-            return news_items
+            # Если у источника есть RSS/Atom-лента, читаем ее вместо главной страницы
+            feed_url = self.feed_registry.get(self.base_url) if self.feed_registry else None
+            news_items = self._parse_feed(feed_url, seen_links) if feed_url else None
+            if news_items is None:
+                if feed_url:
+                    self.feed_registry.forget(self.base_url)
+                news_items = self._parse_html(seen_links)
             
         except Exception as e:
+            self._staged_urls = []
             logger.error(f"Ошибка при парсинге {self.base_url}: {e}")
+            if self.health:
+                self.health.record_failure(self.source_name, time.monotonic() - started, str(e))
+            raise
+        
+        if self.health:
+            self.health.record_success(self.source_name, time.monotonic() - started)
+        return news_items
+    
+    def commit_validators(self):
+        """Подтверждает валидаторы последнего парсинга после использования его результата"""
+        if self.validator_cache:
+            for url in self._staged_urls:
+                self.validator_cache.commit(url)
+        self._staged_urls = []
+    
+    def discard_validators(self):
+        """Отбрасывает валидаторы последнего парсинга: следующий опрос разберет страницу заново"""
+        self._staged_urls = []
+    
+    def _fetch(self, url: str) -> Optional[bytes]:
+        """Загружает URL условным запросом; возвращает None, если содержимое не изменилось"""
+        headers = self.validator_cache.request_headers(url) if self.validator_cache else {}
+        response = fetch(self.session, url, headers=headers)
+        if response.status_code == 304:
+            logger.info(f"{url} ({self.source_name}) не изменился (304), пропускаем парсинг")
+            return None
+        response.raise_for_status()
+        
+        if self.validator_cache:
+            # Валидаторы сохраняются только после того, как результат будет использован
+            content_hash = ValidatorCache.content_hash(response.content)
+            unchanged = self.validator_cache.is_unchanged(url, content_hash)
+            self.validator_cache.stage(
+                url,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                content_hash
+            )
+            self._staged_urls.append(url)
+            if unchanged:
+                logger.info(f"Содержимое {url} ({self.source_name}) не изменилось, пропускаем парсинг")
+                return None
+        
+        return response.content
+    
+    def _parse_html(self, seen_links: Optional[Container[str]] = None) -> List[Dict]:
+        """Парсит главную страницу источника"""
+        logger.info(f"Парсинг новостей с {self.base_url}")
+        content = self._fetch(self.base_url)
+        if content is None:
             return []
+        
+        if PARSE_PROFILE and hasattr(self.backend, 'measure'):
+            self._log_parse_profile(content)
+        
+        document = self.backend.parse(content)
+        
+        if self.feed_registry and self.feed_registry.needs_discovery(self.base_url):
+            feed_url = self.backend.find_feed_url(document)
+            if feed_url:
+                feed_url = urljoin(self.base_url, feed_url)
+                logger.info(f"Найдена лента {self.source_name}: {feed_url}")
+            self.feed_registry.remember(self.base_url, feed_url)
+        
+        # Ищем статьи
+        articles = self._find_articles(document)
+        news_items = self._select_news(self._iter_html_items(articles), seen_links)
+        
+        logger.info(f"Найдено {len(news_items)} технологических новостей с {self.source_name}")
+        return news_items
     
-    def _find_articles(self, soup: BeautifulSoup) -> List:
-        """Находит статьи на странице"""
-        # Ищем статьи в разных секциях
-        articles = soup.find_all(['article', 'div'], class_=re.compile(r'(article|news|post|item|card)'))
+    def _parse_feed(self, feed_url: str, seen_links: Optional[Container[str]] = None) -> Optional[List[Dict]]:
+        """Парсит RSS/Atom-ленту источника; None, если лента недоступна"""
+        logger.info(f"Парсинг ленты {feed_url}")
+        try:
+            content = self._fetch(feed_url)
+            if content is None:
+                return []
+            
+            news_items = self._select_news(self._iter_feed_items(content), seen_links)
+        except Exception as e:
+            self._staged_urls = []
+            logger.warning(f"Лента {feed_url} недоступна, возвращаемся к HTML: {e}")
+            return None
+        
+        logger.info(f"Найдено {len(news_items)} технологических новостей в ленте {self.source_name}")
+        return news_items
+    
+    def _log_parse_profile(self, content: bytes):
+        """Пишет в лог, сколько времени и памяти экономит частичный разбор страницы"""
+        profile = self.backend.measure(content)
+        logger.info(
+            f"Разбор {self.source_name} ({len(content) // 1024} КБ): "
+            f"полный {profile['full_seconds'] * 1000:.0f} мс / {profile['full_peak_bytes'] // 1024} КБ, "
+            f"частичный {profile['partial_seconds'] * 1000:.0f} мс / {profile['partial_peak_bytes'] // 1024} КБ"
+        )
+    
+    def _iter_html_items(self, articles: Iterable) -> Iterator[Dict]:
+        """Лениво извлекает новости из найденных статей"""
+        for article in articles:
+            try:
+                news_item = self._extract_news_item(article)
+            except Exception as e:
+                logger.warning(f"Ошибка при обработке статьи: {e}")
+                continue
+            if news_item:
+                yield news_item
+    
+    def _iter_feed_items(self, content: bytes) -> Iterator[Dict]:
+        """Лениво извлекает новости из RSS/Atom-ленты"""
+        for entry in parse_feed(content):
+            news_item = self._build_news_item(entry['title'], entry['link'])
+            if news_item:
+                if entry['published']:
+                    news_item['published'] = entry['published']
+                yield news_item
+    
+    def _select_news(self, news_items: Iterable[Dict], seen_links: Optional[Container[str]]) -> List[Dict]:
+        """Отбирает новые технологические новости, останавливаясь на уже известной части страницы.
+        
+        Нетехнологические ссылки в индекс обработанных не попадают, поэтому серию
+        известных ссылок они не прерывают и не продолжают. Ссылка, повторно найденная
+        на странице (вложенные или повторяющиеся блоки), учитывается один раз.
+        """
+        selected = []
+        known_in_row = 0
+        page_links = set()
         
-        # Если не нашли по классам, ищем по структуре
-        if not articles:
-            headlines = soup.find_all(['h1', 'h2', 'h3', 'h4'], string=re.compile(r'.+'))
-            for headline in headlines:
-                parent = headline.find_parent(['article', 'div', 'a'])
-                if parent:
-                    articles.append(parent)
+        for news_item in news_items:
+            if not self.is_tech_news(news_item['title']):
+                continue
+            if news_item['link'] in page_links:
+                continue
+            page_links.add(news_item['link'])
+            
+            if seen_links is not None and news_item['link'] in seen_links:
+                known_in_row += 1
+                if EARLY_STOP_KNOWN_LINKS and known_in_row >= EARLY_STOP_KNOWN_LINKS:
+                    logger.info(
+                        f"{known_in_row} уже известных ссылок подряд, "
+                        f"останавливаем разбор {self.source_name}"
+                    )
+                    break
+                continue
+            
+            known_in_row = 0
+            selected.append(news_item)
         
-        return articles
+        return selected
+    
+    def _find_articles(self, document) -> Iterable:
+        """Находит статьи на странице"""
+        return self.backend.find_articles(document)
     
     def _extract_news_item(self, article) -> Dict:
         """Извлекает данные новости из элемента"""
-        # Ищем заголовок
-        title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'a'], string=re.compile(r'.+'))
-        if not title_elem:
+        extracted = self.backend.extract(article)
+        if not extracted:
             return None
         
-        title = title_elem.get_text(strip=True)
+        title, link = extracted
+        return self._build_news_item(title, link)
+    
+    def _build_news_item(self, title: Optional[str], link: Optional[str]) -> Optional[Dict]:
+        """Проверяет заголовок и приводит ссылку к абсолютной"""
         if not title or len(title) < 10:
             return None
         
-        # Ищем ссылку
-        link_elem = article.find('a', href=True)
-        if not link_elem:
-            if title_elem.name == 'a' and title_elem.get('href'):
-                link = title_elem.get('href')
-            else:
-                return None
-        else:
-            link = link_elem.get('href')
+        if not link:
+            return None
         
         # Обрабатываем относительные ссылки
         if link.startswith('/'):
@@ -99,54 +253,14 @@ class BaseNewsParser(ABC):
     
     def is_tech_news(self, title: str) -> bool:
         """Проверяет, содержит ли заголовок ключевые слова технологических новостей"""
-        title_lower = title.lower()
-        
-        # Основные категории ключевых слов
-        startup_keywords = [
-            "стартап", "стартапы", "startup", "startups", "единорог", "unicorn",
-            "акселератор", "инкубатор", "accelerator", "incubator", "венчур", "venture"
-        ]
-        
-        investment_keywords = [
-            "инвестиции", "инвестиция", "investment", "investments", "финансирование",
-            "funding", "раунд", "round", "серия", "series", "капитал", "capital",
-            "фонд", "fund", "инвестор", "investor", "спонсор", "sponsor"
-        ]
-        
-        tech_keywords = [
-            "технологии", "технология", "technology", "tech", "искусственный интеллект",
-            "ИИ", "AI", "блокчейн", "blockchain", "криптовалюта", "crypto", "финтех",
-            "fintech", "цифровизация", "digital", "IT", "айти", "программирование",
-            "programming", "разработка", "development", "софт", "software", "приложение",
-            "application", "данные", "data", "машинное обучение", "machine learning",
-            "нейросеть", "neural network", "автоматизация", "automation", "робот",
-            "robot", "инновации", "innovation", "интернет вещей", "IoT", "облако",
-            "cloud", "кибербезопасность", "cybersecurity", "VR", "AR", "метавселенная",
-            "metaverse", "Web3", "DeFi", "NFT", "токен", "token"
-        ]
-        
-        company_keywords = [
-            "компания", "компании", "company", "компаний", "корпорация", "corporation",
-            "фирма", "firm", "предприятие", "enterprise", "организация", "organization",
-            "бизнес", "business", "предпринимательство", "entrepreneurship"
-        ]
-        
-        # Проверяем наличие ключевых слов по категориям
-        has_startup = any(keyword in title_lower for keyword in startup_keywords)
-        has_investment = any(keyword in title_lower for keyword in investment_keywords)
-        has_tech = any(keyword in title_lower for keyword in tech_keywords)
-        has_company = any(keyword in title_lower for keyword in company_keywords)
+        categories = KEYWORD_MATCHER.match(title.lower())
         
         # Логика фильтрации: должна быть комбинация технологий + (стартапы/инвестиции/компании)
-        if has_tech and (has_startup or has_investment or has_company):
+        if 'tech' in categories and categories & {'startup', 'investment', 'company'}:
             return True
         
         # Также проверяем общие ключевые слова из конфига
-        for keyword in TECH_KEYWORDS:
-            if keyword.lower() in title_lower:
-                return True
-        
-        return False
+        return 'keywords' in categories
 
 class DigitalBusinessParser(BaseNewsParser):
     """Парсер для digitalbusiness.kz"""
@@ -176,24 +290,136 @@ class NewsParser:
     """Основной класс для парсинга новостей из всех источников"""
     
     def __init__(self):
-        self.parsers = [
+        enabled_sources = {source['name'] for source in NEWS_SOURCES if source.get('enabled', True)}
+        parsers = [
             DigitalBusinessParser(),
             SpotUzParser(),
             TheTechParser(),
             BlueScreenParser()
         ]
-    
-    def get_all_news(self) -> List[Dict]:
-        """Получает все новости из всех источников"""
-        all_news = []
+        self.parsers = [parser for parser in parsers if parser.source_name in enabled_sources]
         
+        # Общий кэш валидаторов: неизмененные страницы не скачиваются и не парсятся повторно
+        self.validator_cache = ValidatorCache(HTTP_CACHE_FILE)
+        # Реестр RSS/Atom-лент: HTML парсится только у источников без ленты
+        self.feed_registry = FeedRegistry(FEEDS_FILE, FEED_REDISCOVERY_HOURS) if FEED_MODE == 'auto' else None
+        # Здоровье источников: часто падающие временно отключаются
+        self.health = SourceHealth(
+            HEALTH_WINDOW, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BASE_BACKOFF * 60, CIRCUIT_MAX_BACKOFF * 60
+        )
         for parser in self.parsers:
-            try:
-                news = parser.parse_news()
-                all_news.extend(news)
-            except Exception as e:
-                logger.error(f"Ошибка при парсинге {parser.source_name}: {e}")
+            parser.validator_cache = self.validator_cache
+            parser.feed_registry = self.feed_registry
+            parser.health = self.health
+        # Расписание опроса: активные источники опрашиваются чаще, тихие - реже
+        self.scheduler = PollScheduler(
+            POLL_SCHEDULE_FILE,
+            CHECK_INTERVAL * 60, POLL_MIN_INTERVAL * 60, POLL_MAX_INTERVAL * 60, POLL_JITTER
+        )
+        
+        # Пул потоков для параллельной загрузки источников
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, min(FETCH_MAX_WORKERS, len(self.parsers))),
+            thread_name_prefix='news-fetch'
+        )
+        # Загрузки, которые еще не завершились (например, после превышения лимита цикла)
+        self._inflight = {}
+    
+    def _is_inflight(self, parser: BaseNewsParser) -> bool:
+        """Проверяет, идет ли еще загрузка источника"""
+        future = self._inflight.get(parser.source_name)
+        return future is not None and not future.done()
+    
+    def due_parsers(self) -> List[BaseNewsParser]:
+        """Источники, которые пора опросить по расписанию, не загружаются и не отключены"""
+        due = set(self.scheduler.due(parser.source_name for parser in self.parsers))
+        return [
+            parser for parser in self.parsers
+            if parser.source_name in due and not self._is_inflight(parser)
+            and self.health.is_available(parser.source_name)
+        ]
+    
+    def seconds_until_due(self) -> float:
+        """Сколько секунд до ближайшего опроса по расписанию"""
+        return self.scheduler.seconds_until_due(parser.source_name for parser in self.parsers)
+    
+    def _submit(self, seen_links: Optional[Container[str]], parsers: Optional[List[BaseNewsParser]] = None) -> Dict:
+        """Запускает парсинг источников (по умолчанию всех) в пуле потоков"""
+        futures = {}
+        for parser in self.parsers if parsers is None else parsers:
+            if self._is_inflight(parser):
+                logger.warning(f"Предыдущая загрузка {parser.source_name} еще не завершена, пропускаем")
                 continue
+            if not self.health.allow_request(parser.source_name):
+                logger.info(f"Источник {parser.source_name} временно отключен после ошибок, пропускаем")
+                continue
+            self.scheduler.start(parser.source_name)
+            future = self.executor.submit(parser.parse_news, seen_links)
+            self._inflight[parser.source_name] = future
+            futures[future] = parser
+        return futures
+    
+    def _save_caches(self):
+        """Сохраняет кэш валидаторов, реестр лент и расписание опроса"""
+        self.validator_cache.save()
+        self.scheduler.save()
+        if self.feed_registry:
+            self.feed_registry.save()
+    
+    def _log_late_sources(self, parsers: Iterable[BaseNewsParser]):
+        """Сообщает об источниках, не уложившихся в лимит времени цикла"""
+        parsers = list(parsers)
+        for parser in parsers:
+            # Результат опроса потерян, частоту публикаций по нему не оцениваем
+            self.scheduler.release(parser.source_name)
+        logger.warning(
+            f"Превышен лимит времени цикла ({FETCH_CYCLE_DEADLINE} с), "
+            f"не дождались источников: {', '.join(parser.source_name for parser in parsers)}"
+        )
+    
+    def discard_validators(self, source_name: str):
+        """Не подтверждать валидаторы источника: его новости не удалось обработать"""
+        for parser in self.parsers:
+            if parser.source_name == source_name:
+                parser.discard_validators()
+    
+    async def iter_news(self, seen_links: Optional[Container[str]] = None,
+                        parsers: Optional[List[BaseNewsParser]] = None) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Асинхронно выдает новости каждого источника (по умолчанию всех), как только он разобран.
+        
+        Валидаторы источника подтверждаются, когда потребитель запросил следующую
+        порцию, то есть после того, как он обработал текущую. Если обработать не
+        удалось, потребитель вызывает discard_validators(source_name) до этого.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + FETCH_CYCLE_DEADLINE
+        tasks = {
+            asyncio.wrap_future(future): parser
+            for future, parser in self._submit(seen_links, parsers).items()
+        }
+        pending = set(tasks)
         
-        logger.info(f"Всего найдено {len(all_news)} новостей из всех источников")
-        return all_news
+        try:
+            while pending:
+                # После лимита забираем только уже готовые источники: они могли
+                # завершиться, пока потребитель обрабатывал предыдущую порцию
+                timeout = max(deadline - loop.time(), 0)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self._log_late_sources(tasks[task] for task in pending)
+                    break
+                
+                for task in done:
+                    parser = tasks[task]
+                    try:
+                        news = task.result()
+                    except Exception:
+                        # Ошибку уже записал parse_news; неудачный опрос не меняет оценку частоты
+                        self.scheduler.release(parser.source_name)
+                        continue
+                    
+                    self.scheduler.record(parser.source_name, len(news))
+                    yield parser.source_name, news
+                    parser.commit_validators()
+        finally:
+            await loop.run_in_executor(None, self._save_caches)
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Вес нового наблюдения в скользящей оценке частоты публикаций
+RATE_SMOOTHING = 0.3
+
+class PollScheduler:
+    """Постоянное расписание опроса источников с интервалом по частоте их публикаций.
+
+    Для каждого источника хранится сглаженная оценка числа новых новостей в час;
+    интервал подбирается так, чтобы за один опрос появлялась примерно одна новость,
+    и ограничивается min_interval..max_interval (в секундах). Время следующего
+    опроса сдвигается на случайную долю jitter интервала, чтобы источники
+    не опрашивались все разом.
+    """
+
+    def __init__(self, path: str, initial_interval: float, min_interval: float, max_interval: float, jitter: float):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.initial_interval = self._clamp(initial_interval)
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        # Пределы могли измениться с прошлого запуска
+        for entry in self._entries.values():
+            entry['interval'] = self._clamp(entry.get('interval', self.initial_interval))
+        # Источники, чей опрос запущен и еще не учтен: имя -> время запуска
+        self._started: Dict[str, float] = {}
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        """Загружает расписание из файла"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Ошибка при загрузке расписания опроса: {e}")
+        return {}
+
+    def _clamp(self, interval: float) -> float:
+        """Ограничивает интервал настроенными пределами"""
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _entry(self, source: str) -> Dict:
+        """Запись источника; новый источник опрашивается сразу"""
+        if source not in self._entries:
+            self._entries[source] = {'interval': self.initial_interval, 'rate': None, 'last_poll': None, 'next_poll': 0}
+        return self._entries[source]
+
+    def _next_poll(self, started: float, interval: float) -> float:
+        """Время следующего опроса со случайным сдвигом"""
+        return started + interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def due(self, sources: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Источники, которые пора опросить; уже запущенные не повторяются"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                source for source in sources
+                if source not in self._started and self._entry(source)['next_poll'] <= now
+            ]
+
+    def start(self, source: str, now: Optional[float] = None):
+        """Отмечает запуск опроса; до его учета источник не считается просроченным"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entry(source)
+            self._started[source] = now
+            entry['next_poll'] = self._next_poll(now, entry['interval'])
+            self._dirty = True
+
+    def record(self, source: str, new_count: int, now: Optional[float] = None):
+        """Учитывает результат опроса и пересчитывает интервал источника"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entry(source)
+            started = self._started.pop(source, now)
+
+            # Первый опрос источника дает всю страницу сразу - по нему частоту не оцениваем
+            if entry['last_poll'] is not None and started > entry['last_poll']:
+                observed = new_count / ((started - entry['last_poll']) / 3600)
+                if entry['rate'] is None:
+                    entry['rate'] = observed
+                else:
+                    entry['rate'] = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * entry['rate']
+                # Около одной новой новости за опрос; без публикаций - реже всего
+                interval = 3600 / entry['rate'] if entry['rate'] > 0 else self.max_interval
+                entry['interval'] = self._clamp(interval)
+
+            entry['last_poll'] = started
+            entry['next_poll'] = self._next_poll(started, entry['interval'])
+            self._dirty = True
+
+    def release(self, source: str):
+        """Снимает отметку запуска без учета результата (ошибка или лимит цикла)"""
+        with self._lock:
+            self._started.pop(source, None)
+
+    def interval(self, source: str) -> float:
+        """Текущий интервал опроса источника в секундах"""
+        with self._lock:
+            return self._entry(source)['interval']
+
+    def seconds_until_due(self, sources: Iterable[str], now: Optional[float] = None) -> float:
+        """Сколько секунд до ближайшего опроса"""
+        now = time.time() if now is None else now
+        with self._lock:
+            moments = [self._entry(source)['next_poll'] for source in sources if source not in self._started]
+        if not moments:
+            return self.min_interval
+        return max(0.0, min(moments) - now)
+
+    def save(self):
+        """Атомарно сохраняет расписание на диск, если оно изменилось"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = {source: dict(entry) for source, entry in self._entries.items()}
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении расписания опроса: {e}")
+            with self._lock:
+                self._dirty = True
@@ -0,0 +1,146 @@
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from time_index import parse_timestamp
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Сегмент для старых записей без времени публикации
+UNDATED = 'undated'
+
+def published_month(news: Dict) -> str:
+    """Месяц публикации новости в виде YYYY-MM (или UNDATED)"""
+    moment = parse_timestamp(news.get('timestamp'))
+    return moment.strftime('%Y-%m') if moment else UNDATED
+
+def _month_bounds(month: str):
+    """Начало месяца и начало следующего"""
+    start = datetime.strptime(month, '%Y-%m')
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+class PublishedArchive:
+    """Архив опубликованных новостей: по сжатому сегменту на месяц и манифест со счетчиками.
+    
+    Сегменты распаковываются только когда запрос действительно их касается.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.manifest = self._load_manifest()
+    
+    def _load_manifest(self) -> Dict:
+        """Загружает манифест архива"""
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Ошибка при загрузке манифеста архива: {e}")
+        return {'segments': {}}
+    
+    def _save_manifest(self):
+        """Атомарно сохраняет манифест"""
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    @property
+    def count(self) -> int:
+        """Число новостей в архиве (по манифесту, без распаковки)"""
+        return sum(segment['count'] for segment in self.manifest['segments'].values())
+    
+    def months(self) -> List[str]:
+        """Месяцы архива от старых к новым; записи без времени считаются самыми старыми"""
+        return sorted(self.manifest['segments'], key=lambda month: (month != UNDATED, month))
+    
+    def _segment_path(self, month: str) -> str:
+        return os.path.join(self.directory, f"published-{month}.json.gz")
+    
+    def load_segment(self, month: str) -> List[Dict]:
+        """Распаковывает сегмент месяца"""
+        if month not in self.manifest['segments']:
+            return []
+        try:
+            with gzip.open(self._segment_path(month), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке архива за {month}: {e}")
+            return []
+    
+    def _write_segment(self, month: str, items: List[Dict]):
+        """Атомарно записывает сжатый сегмент"""
+        path = self._segment_path(month)
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def add(self, by_month: Dict[str, List[Dict]]):
+        """Дописывает новости в сегменты их месяцев; уже архивированные ссылки пропускаются"""
+        os.makedirs(self.directory, exist_ok=True)
+        for month, news_list in by_month.items():
+            items = self.load_segment(month)
+            known_links = {news.get('link') for news in items}
+            for news in news_list:
+                if news.get('link') not in known_links:
+                    items.append(news)
+                    known_links.add(news.get('link'))
+            
+            self._write_segment(month, items)
+            self.manifest['segments'][month] = {
+                'file': os.path.basename(self._segment_path(month)),
+                'count': len(items)
+            }
+        self._save_manifest()
+    
+    def clear(self):
+        """Удаляет все сегменты архива"""
+        for month in list(self.manifest['segments']):
+            path = self._segment_path(month)
+            if os.path.exists(path):
+                os.remove(path)
+        self.manifest = {'segments': {}}
+        if os.path.exists(self.manifest_path):
+            self._save_manifest()
+    
+    def iter_items(self) -> Iterator[Dict]:
+        """Выдает все новости архива, распаковывая по одному сегменту"""
+        for month in self.months():
+            yield from self.load_segment(month)
+    
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """Новости с start <= timestamp < end; распаковываются только пересекающиеся месяцы"""
+        result = []
+        for month in self.months():
+            if month == UNDATED:
+                continue
+            month_start, month_end = _month_bounds(month)
+            if (start is not None and month_end <= start) or (end is not None and month_start >= end):
+                continue
+            
+            dated = []
+            for news in self.load_segment(month):
+                moment = parse_timestamp(news.get('timestamp'))
+                if moment and (start is None or moment >= start) and (end is None or moment < end):
+                    dated.append((moment, news))
+            dated.sort(key=lambda pair: pair[0])
+            result.extend(news for _, news in dated)
+        return result
+    
+    def recent_links(self, limit: int) -> List[str]:
+        """Ссылки последних limit новостей архива (от старых к новым)"""
+        links = []
+        for month in reversed(self.months()):
+            if len(links) >= limit:
+                break
+            segment_links = [news['link'] for news in self.load_segment(month) if 'link' in news]
+            links = segment_links[-(limit - len(links)):] + links
+        return links
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Union
+from telegram import Bot
+from telegram.error import BadRequest, NetworkError, RetryAfter
+from config import (
+    TELEGRAM_GLOBAL_MESSAGES_PER_SECOND, TELEGRAM_CHAT_MESSAGES_PER_SECOND,
+    TELEGRAM_GROUP_MESSAGES_PER_MINUTE, TELEGRAM_EDITS_PER_SECOND, SEND_MAX_RETRIES, SEND_RETRY_BACKOFF
+)
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Ведро токенов: не больше rate операций в секунду с запасом capacity.
+    
+    Ожидающие получают токены строго по очереди (asyncio.Lock справедлив).
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self):
+        """Дожидается и забирает один токен"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+    
+    def block(self, seconds: float):
+        """Останавливает выдачу токенов на seconds секунд (например, по RetryAfter)"""
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0
+        self._updated = self._blocked_until
+
+class SendQueue:
+    """Очередь исходящих запросов к Telegram с учетом лимитов.
+    
+    Общий темп ограничен глобальным ведром, каждый чат - своим (группы и каналы
+    медленнее личных чатов). RetryAfter приостанавливает чат на указанное время,
+    сетевые ошибки повторяются с экспоненциальной задержкой. Сообщение, которое
+    нельзя отправить дважды, передается с retry_network=False: после таймаута
+    неизвестно, дошло ли оно, поэтому повторяется только RetryAfter.
+    Правки сообщений (отметки в дайджестах) идут через отдельные ведра чатов и
+    не расходуют лимит новых сообщений группы.
+    """
+    
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.global_bucket = TokenBucket(TELEGRAM_GLOBAL_MESSAGES_PER_SECOND, TELEGRAM_GLOBAL_MESSAGES_PER_SECOND)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._edit_buckets: Dict[str, TokenBucket] = {}
+    
+    def _chat_bucket(self, chat_id: Union[int, str, None], edit: bool = False) -> TokenBucket:
+        key = str(chat_id)
+        if edit:
+            if key not in self._edit_buckets:
+                self._edit_buckets[key] = TokenBucket(TELEGRAM_EDITS_PER_SECOND)
+            return self._edit_buckets[key]
+        if key not in self._chat_buckets:
+            # Отрицательные id и @username - группы и каналы
+            if key.startswith('-') or key.startswith('@'):
+                rate = TELEGRAM_GROUP_MESSAGES_PER_MINUTE / 60
+            else:
+                rate = TELEGRAM_CHAT_MESSAGES_PER_SECOND
+            self._chat_buckets[key] = TokenBucket(rate)
+        return self._chat_buckets[key]
+    
+    async def call(self, method, retry_network: bool = True, edit: bool = False, **kwargs):
+        """Выполняет метод Bot с соблюдением лимитов и повторами"""
+        bucket = self._chat_bucket(kwargs.get('chat_id'), edit)
+        for attempt in range(SEND_MAX_RETRIES + 1):
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await method(**kwargs)
+            except RetryAfter as e:
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                logger.warning(f"Лимит Telegram для чата {kwargs.get('chat_id')}: ждем {delay} с")
+                bucket.block(float(delay))
+                if attempt == SEND_MAX_RETRIES:
+                    raise
+            except BadRequest:
+                # Ошибка в самом запросе: повтор не поможет
+                raise
+            except NetworkError as e:
+                # TimedOut тоже NetworkError: запрос мог дойти до Telegram
+                if not retry_network or attempt == SEND_MAX_RETRIES:
+                    raise
+                delay = SEND_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Ошибка сети при обращении к Telegram: {e}, повтор через {delay} с")
+                await asyncio.sleep(delay)
+    
+    async def send_message(self, retry_network: bool = True, **kwargs):
+        return await self.call(self.bot.send_message, retry_network, **kwargs)
+    
+    async def edit_message_text(self, **kwargs):
+        return await self.call(self.bot.edit_message_text, edit=True, **kwargs)
+    
+    async def edit_message_reply_markup(self, **kwargs):
+        return await self.call(self.bot.edit_message_reply_markup, edit=True, **kwargs)
@@ -0,0 +1,140 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Состояния цепи источника
+CLOSED = 'closed'        # источник опрашивается как обычно
+OPEN = 'open'            # источник пропускается до retry_at
+HALF_OPEN = 'half_open'  # идет пробный опрос
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Перцентиль по ближайшему рангу; None для пустого списка"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(1, math.ceil(fraction * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+class SourceState:
+    """Здоровье одного источника: последние опросы и состояние цепи"""
+
+    def __init__(self, window: int):
+        # (длительность в секундах, успех) последних опросов
+        self.samples = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.state = CLOSED
+        self.retry_at = 0.0
+        self.backoff = 0.0
+
+    def latencies(self) -> List[float]:
+        """Длительности последних опросов"""
+        return [duration for duration, _ in self.samples]
+
+    def error_rate(self) -> float:
+        """Доля неудачных опросов среди последних"""
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+class SourceHealth:
+    """Здоровье источников и автомат отключения (circuit breaker).
+
+    После failure_threshold ошибок подряд цепь источника размыкается: он не
+    загружается и не занимает соединения до retry_at. Затем выполняется один
+    пробный опрос; при неудаче пауза удваивается (до max_backoff), при успехе
+    источник снова опрашивается по расписанию.
+    """
+
+    def __init__(self, window: int, failure_threshold: int, base_backoff: float, max_backoff: float):
+        self.window = window
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max(max_backoff, base_backoff)
+        self._lock = threading.Lock()
+        self._sources: Dict[str, SourceState] = {}
+
+    def _source(self, source: str) -> SourceState:
+        """Состояние источника; новый источник считается здоровым"""
+        if source not in self._sources:
+            self._sources[source] = SourceState(self.window)
+        return self._sources[source]
+
+    def is_available(self, source: str, now: Optional[float] = None) -> bool:
+        """Можно ли опрашивать источник (без изменения состояния)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._source(source)
+            if entry.state == CLOSED:
+                return True
+            return entry.state == OPEN and now >= entry.retry_at
+
+    def allow_request(self, source: str, now: Optional[float] = None) -> bool:
+        """Разрешает опрос; у разомкнутой цепи после паузы пропускает один пробный"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._source(source)
+            if entry.state == CLOSED:
+                return True
+            if entry.state == OPEN and now >= entry.retry_at:
+                entry.state = HALF_OPEN
+                logger.info(f"Пробный опрос источника {source} после паузы {entry.backoff / 60:.0f} мин")
+                return True
+            return False
+
+    def record_success(self, source: str, duration: float):
+        """Учитывает успешный опрос"""
+        with self._lock:
+            entry = self._source(source)
+            entry.samples.append((duration, True))
+            entry.consecutive_failures = 0
+            if entry.state != CLOSED:
+                logger.info(f"Источник {source} снова доступен")
+            entry.state = CLOSED
+            entry.backoff = 0.0
+
+    def record_failure(self, source: str, duration: float, error: str, now: Optional[float] = None):
+        """Учитывает неудачный опрос и при необходимости размыкает цепь"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._source(source)
+            entry.samples.append((duration, False))
+            entry.consecutive_failures += 1
+            entry.last_error = error
+
+            if entry.state == HALF_OPEN:
+                # Пробный опрос не удался: пауза удваивается
+                entry.backoff = min(entry.backoff * 2, self.max_backoff)
+            elif entry.state == CLOSED and entry.consecutive_failures >= self.failure_threshold:
+                entry.backoff = self.base_backoff
+            else:
+                return
+
+            entry.state = OPEN
+            entry.retry_at = now + entry.backoff
+            logger.warning(
+                f"Источник {source}: {entry.consecutive_failures} ошибок подряд, "
+                f"отключаем на {entry.backoff / 60:.0f} мин: {error}"
+            )
+
+    def snapshot(self, source: str) -> Dict:
+        """Сводка здоровья источника для /status"""
+        with self._lock:
+            entry = self._source(source)
+            latencies = entry.latencies()
+            return {
+                'state': entry.state,
+                'polls': len(entry.samples),
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'error_rate': entry.error_rate(),
+                'consecutive_failures': entry.consecutive_failures,
+                'last_error': entry.last_error,
+                'retry_at': entry.retry_at if entry.state == OPEN else None
+            }
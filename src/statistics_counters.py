@@ -0,0 +1,72 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Действие -> (дневной счетчик, общий счетчик)
+COUNTERS = {
+    'parsed': ('parsed_today', 'total_parsed'),
+    'published': ('published_today', 'total_published'),
+    'rejected': ('rejected_today', 'total_rejected'),
+}
+
+class StatisticsCounters:
+    """Счетчики статистики в памяти.
+    
+    Обновление меняет только словарь; на диск счетчики сбрасываются целиком
+    через flush() - по таймеру и при остановке бота.
+    """
+    
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._stats = storage.load_statistics()
+        self._dirty = False
+    
+    def increment(self, action: str, count: int = 1):
+        """Увеличивает счетчики действия, сбрасывая дневные при смене даты"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            stats = self._stats
+            
+            # Сбрасываем дневную статистику если новый день
+            if stats['last_reset_date'] != today:
+                stats['parsed_today'] = 0
+                stats['published_today'] = 0
+                stats['rejected_today'] = 0
+                stats['last_reset_date'] = today
+            
+            if action in COUNTERS:
+                daily, total = COUNTERS[action]
+                stats[daily] += count
+                stats[total] += count
+            self._dirty = True
+    
+    def snapshot(self) -> Dict:
+        """Возвращает копию текущих счетчиков"""
+        with self._lock:
+            return dict(self._stats)
+    
+    def replace(self, stats: Dict):
+        """Заменяет счетчики целиком"""
+        with self._lock:
+            self._stats = dict(stats)
+            self._dirty = True
+    
+    def flush(self):
+        """Сохраняет счетчики, если они изменились с прошлого сброса"""
+        with self._lock:
+            if not self._dirty:
+                return
+            stats = dict(self._stats)
+            self._dirty = False
+        
+        try:
+            self.storage.save_statistics(stats)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении статистики: {e}")
+            with self._lock:
+                self._dirty = True
@@ -0,0 +1,669 @@
+import json
+import os
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterator, List, Dict, Optional, Set
+from journal import Journal
+from time_index import TimeIndex, parse_timestamp
+from published_archive import PublishedArchive, published_month, UNDATED
+from config import (
+    STORAGE_BACKEND, DATABASE_FILE, JOURNAL_FSYNC_BATCH, JOURNAL_FSYNC_INTERVAL, JOURNAL_COMPACT_LINES
+)
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Статусы новости на модерации: pending -> publishing -> published.
+# Старые записи без поля status считаются pending
+PENDING = 'pending'
+PUBLISHING = 'publishing'
+PUBLISHED = 'published'
+
+def pending_status(news: Dict) -> str:
+    """Возвращает статус новости на модерации"""
+    return news.get('status', PENDING)
+
+def default_statistics() -> Dict:
+    """Возвращает пустую статистику"""
+    return {
+        'parsed_today': 0,
+        'published_today': 0,
+        'rejected_today': 0,
+        'total_parsed': 0,
+        'total_published': 0,
+        'total_rejected': 0,
+        'last_reset_date': datetime.now().strftime('%Y-%m-%d')
+    }
+
+def normalize_published(data: List) -> List[Dict]:
+    """Обрабатывает как старые записи (строки), так и новые (объекты)"""
+    result = []
+    for item in data:
+        if isinstance(item, str):
+            # Старый формат - только ссылка
+            result.append({'link': item})
+        elif isinstance(item, dict):
+            # Новый формат - полный объект
+            result.append(item)
+    return result
+
+def apply_published(items: List, records: List[Dict]) -> List[Dict]:
+    """Дописывает к снимку опубликованных новостей записи журнала, которых в нем еще нет"""
+    items = normalize_published(items)
+    known_links = {news.get('link') for news in items}
+    for news in records:
+        if news.get('link') not in known_links:
+            items.append(news)
+            known_links.add(news.get('link'))
+    return items
+
+def apply_pending(items: List, records: List[Dict]) -> List[Dict]:
+    """Применяет к снимку новостей на модерации операции журнала (add/update/remove).
+
+    Новость определяется парой (id, ссылка): у старых записей id могли повторяться.
+    """
+    items = list(items)
+    keys = {(news.get('id'), news.get('link')) for news in items}
+    for record in records:
+        news = record.get('news')
+        key = (news.get('id'), news.get('link')) if news else (record.get('id'), record.get('link'))
+        op = record.get('op')
+        if op == 'add' and key not in keys:
+            items.append(news)
+            keys.add(key)
+        elif op == 'update' and key in keys:
+            items = [news if (item.get('id'), item.get('link')) == key else item for item in items]
+        elif op == 'remove' and key in keys:
+            items = [item for item in items if (item.get('id'), item.get('link')) != key]
+            keys.discard(key)
+    return items
+
+class NewsStorage(ABC):
+    """Хранилище новостей на модерации, опубликованных новостей и статистики"""
+
+    @abstractmethod
+    def load_pending(self) -> List[Dict]:
+        """Загружает список новостей на модерации"""
+
+    @abstractmethod
+    def reserve_pending_id(self) -> int:
+        """Выдает новый id новости на модерации; id не повторяются и после удаления новостей"""
+
+    @abstractmethod
+    def get_pending(self, news_id: int) -> Optional[Dict]:
+        """Возвращает новость на модерации по id"""
+
+    @abstractmethod
+    def add_pending(self, news: Dict):
+        """Добавляет новость на модерацию"""
+
+    @abstractmethod
+    def update_pending(self, news: Dict):
+        """Перезаписывает новость на модерации (ищется по id и ссылке)"""
+
+    @abstractmethod
+    def remove_pending(self, news_id: int):
+        """Удаляет новость из списка ожидающих модерации"""
+
+    @abstractmethod
+    def count_pending(self) -> int:
+        """Возвращает число новостей на модерации"""
+
+    @abstractmethod
+    def load_published(self) -> List[Dict]:
+        """Загружает список опубликованных новостей"""
+
+    @abstractmethod
+    def add_published(self, news: Dict):
+        """Добавляет новость в список опубликованных"""
+
+    @abstractmethod
+    def count_published(self) -> int:
+        """Возвращает число опубликованных новостей"""
+
+    @abstractmethod
+    def published_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """Возвращает опубликованные новости с start <= timestamp < end по возрастанию времени.
+
+        Записи без времени или с некорректным временем пропускаются.
+        """
+
+    def published_since(self, since: datetime) -> List[Dict]:
+        """Возвращает опубликованные новости начиная с since"""
+        return self.published_between(since)
+
+    @abstractmethod
+    def load_links(self) -> Set[str]:
+        """Возвращает ссылки новостей на модерации и опубликованных"""
+
+    @abstractmethod
+    def load_pending_links(self) -> Set[str]:
+        """Возвращает ссылки новостей на модерации"""
+
+    @abstractmethod
+    def iter_published_links(self) -> Iterator[str]:
+        """Выдает ссылки опубликованных новостей от старых к новым"""
+
+    @abstractmethod
+    def load_recent_published_links(self, limit: int) -> List[str]:
+        """Возвращает ссылки последних limit опубликованных новостей (от старых к новым)"""
+
+    @abstractmethod
+    def load_statistics(self) -> Dict:
+        """Загружает статистику"""
+
+    @abstractmethod
+    def save_statistics(self, stats: Dict):
+        """Сохраняет статистику"""
+
+    def close(self):
+        """Освобождает ресурсы хранилища"""
+
+class JsonStorage(NewsStorage):
+    """Хранилище в JSON-файлах.
+
+    Изменения новостей на модерации и опубликованных дописываются в журналы
+    (*.jsonl) и в фоне сворачиваются в JSON-снимки. В published_news.json остается
+    только текущий месяц, прошлые месяцы уходят в сжатый архив.
+    С read_only=True файлы только читаются (перенос в SQLite): нет ни архивации,
+    ни завершения прерванной свертки журналов.
+    """
+
+    def __init__(self, data_dir: str, read_only: bool = False):
+        self.pending_news_file = os.path.join(data_dir, 'pending_news.json')
+        self.pending_ids_file = os.path.join(data_dir, 'pending_ids.json')
+        self.published_news_file = os.path.join(data_dir, 'published_news.json')
+        self.statistics_file = os.path.join(data_dir, 'statistics.json')
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(data_dir, exist_ok=True)
+        self.pending_journal = self._journal(self.pending_news_file, apply_pending, read_only)
+        self.published_journal = self._journal(self.published_news_file, apply_published, read_only)
+        # id -> новости на модерации (список: у старых записей id могли повторяться)
+        self._pending = None
+        self._next_pending_id = None
+        self.archive = PublishedArchive(os.path.join(data_dir, 'archive'))
+        # Новости текущего месяца и их индекс по времени загружаются при первом запросе
+        self._active = None
+        self._active_index = None
+        self._active_month = None
+
+    @staticmethod
+    def _journal(snapshot_path: str, apply, read_only: bool = False) -> Journal:
+        return Journal(
+            snapshot_path,
+            apply,
+            fsync_batch=JOURNAL_FSYNC_BATCH,
+            fsync_interval=JOURNAL_FSYNC_INTERVAL,
+            compact_lines=JOURNAL_COMPACT_LINES,
+            read_only=read_only
+        )
+
+    def _read(self, path: str, name: str):
+        """Читает JSON-файл; None, если файла нет или он поврежден"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке {name}: {e}")
+            return None
+
+    def _write(self, path: str, name: str, data):
+        """Атомарно перезаписывает JSON-файл"""
+        try:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении {name}: {e}")
+
+    def _load_pending_map(self) -> Dict[int, List[Dict]]:
+        """Новости на модерации по id; снимок и журнал читаются один раз"""
+        if self._pending is None:
+            pending = {}
+            for news in self.pending_journal.load():
+                pending.setdefault(news.get('id'), []).append(news)
+            self._pending = pending
+        return self._pending
+
+    def _append_pending_op(self, record: Dict):
+        """Дописывает операцию над новостями на модерации в журнал"""
+        try:
+            self.pending_journal.append(record)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении pending_news: {e}")
+
+    def load_pending(self) -> List[Dict]:
+        return [news for items in self._load_pending_map().values() for news in items]
+
+    def save_pending(self, news_list: List[Dict]):
+        """Сохраняет список новостей на модерации целиком и очищает журнал"""
+        try:
+            self.pending_journal.reset(news_list)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении pending_news: {e}")
+        self._pending = None
+
+    def reserve_pending_id(self) -> int:
+        if self._next_pending_id is None:
+            data = self._read(self.pending_ids_file, 'pending_ids') or {}
+            # Без счетчика продолжаем после самого большого id на модерации
+            known_ids = [news_id for news_id in self._load_pending_map() if isinstance(news_id, int)]
+            self._next_pending_id = max([data.get('next_id', 0)] + [news_id + 1 for news_id in known_ids])
+
+        news_id = self._next_pending_id
+        self._next_pending_id += 1
+        self._write(self.pending_ids_file, 'pending_ids', {'next_id': self._next_pending_id})
+        return news_id
+
+    def get_pending(self, news_id: int) -> Optional[Dict]:
+        items = self._load_pending_map().get(news_id)
+        return items[0] if items else None
+
+    def add_pending(self, news: Dict):
+        pending = self._load_pending_map()
+        self._append_pending_op({'op': 'add', 'news': news})
+        pending.setdefault(news.get('id'), []).append(news)
+
+    def update_pending(self, news: Dict):
+        items = self._load_pending_map().get(news.get('id'), [])
+        for i, item in enumerate(items):
+            if item.get('link') == news.get('link'):
+                items[i] = news
+                self._append_pending_op({'op': 'update', 'news': news})
+                break
+
+    def remove_pending(self, news_id: int):
+        pending = self._load_pending_map()
+        items = pending.get(news_id)
+        if not items:
+            return
+        news = items.pop(0)
+        if not items:
+            del pending[news_id]
+        self._append_pending_op({'op': 'remove', 'id': news_id, 'link': news.get('link')})
+
+    def count_pending(self) -> int:
+        return sum(len(items) for items in self._load_pending_map().values())
+
+    def _load_active(self) -> List[Dict]:
+        """Новости текущего месяца из снимка и журнала"""
+        if self._active is None:
+            if self.read_only:
+                # Без архивации: снимок читается как есть, вместе с прошлыми месяцами
+                self._active = self.published_journal.load()
+                return self._active
+            if not self.has_published():
+                # Создаем файл если не существует
+                self.save_published([])
+            self._active = self.published_journal.load()
+            self.roll_over()
+        return self._active
+
+    def roll_over(self):
+        """Переносит новости прошлых месяцев из снимка в архив"""
+        current_month = datetime.now().strftime('%Y-%m')
+        self._active_month = current_month
+
+        archived = {}
+        kept = []
+        for news in self._active:
+            month = published_month(news)
+            if month == UNDATED or month < current_month:
+                archived.setdefault(month, []).append(news)
+            else:
+                kept.append(news)
+        if not archived:
+            return
+
+        try:
+            # Сначала архив, потом снимок: при сбое между ними повторный перенос
+            # не создаст дублей, архив пропускает уже известные ссылки
+            self.archive.add(archived)
+            self.published_journal.reset(kept)
+        except Exception as e:
+            logger.error(f"Ошибка при архивации опубликованных новостей: {e}")
+            return
+
+        self._active = kept
+        self._active_index = None
+        logger.info(f"В архив перенесено {sum(len(items) for items in archived.values())} опубликованных новостей")
+
+    def load_published(self) -> List[Dict]:
+        active = self._load_active()
+        return list(self.archive.iter_items()) + active
+
+    def has_pending(self) -> bool:
+        """Проверяет, есть ли на диске снимок или журнал новостей на модерации"""
+        return self.pending_journal.exists()
+
+    def has_published(self) -> bool:
+        """Проверяет, есть ли на диске снимок, журнал или архив опубликованных новостей"""
+        return self.published_journal.exists() or os.path.exists(self.archive.manifest_path)
+
+    def save_published(self, published_news: List[Dict]):
+        """Сохраняет список опубликованных новостей целиком, очищая журнал и архив"""
+        try:
+            self.archive.clear()
+            self.published_journal.reset(published_news)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении published_news: {e}")
+        self._active = None
+        self._active_index = None
+
+    def add_published(self, news: Dict):
+        active = self._load_active()
+        # Одна строка в журнале вместо перезаписи всего списка
+        try:
+            self.published_journal.append(news)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении published_news: {e}")
+            return
+        active.append(news)
+        if self._active_index is not None:
+            self._index_published(self._active_index, news)
+
+        if datetime.now().strftime('%Y-%m') != self._active_month:
+            self.roll_over()
+
+    def count_published(self) -> int:
+        active = self._load_active()
+        # Архив считается по манифесту, без распаковки
+        return self.archive.count + len(active)
+
+    @staticmethod
+    def _index_published(index: TimeIndex, news: Dict):
+        """Добавляет новость в индекс, если у нее корректное время"""
+        moment = parse_timestamp(news.get('timestamp'))
+        if moment is not None:
+            index.add(moment, news)
+
+    def published_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        active = self._load_active()
+        if self._active_index is None:
+            index = TimeIndex()
+            for news in active:
+                self._index_published(index, news)
+            self._active_index = index
+        return self.archive.between(start, end) + self._active_index.between(start, end)
+
+    def load_links(self) -> Set[str]:
+        links = self.load_pending_links()
+        links.update(self.iter_published_links())
+        return links
+
+    def load_pending_links(self) -> Set[str]:
+        return {news['link'] for news in self.load_pending() if 'link' in news}
+
+    def iter_published_links(self) -> Iterator[str]:
+        active = self._load_active()
+        for news in self.archive.iter_items():
+            if 'link' in news:
+                yield news['link']
+        for news in active:
+            if 'link' in news:
+                yield news['link']
+
+    def load_recent_published_links(self, limit: int) -> List[str]:
+        if limit <= 0:
+            return []
+        links = [news['link'] for news in self._load_active() if 'link' in news][-limit:]
+        if len(links) < limit:
+            links = self.archive.recent_links(limit - len(links)) + links
+        return links
+
+    def load_statistics(self) -> Dict:
+        return self._read(self.statistics_file, 'статистики') or default_statistics()
+
+    def save_statistics(self, stats: Dict):
+        self._write(self.statistics_file, 'статистики', stats)
+
+    def close(self):
+        self.pending_journal.close()
+        self.published_journal.close()
+
+class SqliteStorage(NewsStorage):
+    """Хранилище в SQLite (WAL): изменения записываются построчно, без перезаписи файлов"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pending_news (
+            row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            news_id INTEGER,
+            link TEXT NOT NULL UNIQUE,
+            timestamp TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_pending_news_id ON pending_news(news_id);
+        CREATE INDEX IF NOT EXISTS idx_pending_timestamp ON pending_news(timestamp);
+
+        CREATE TABLE IF NOT EXISTS published_news (
+            row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link TEXT NOT NULL UNIQUE,
+            timestamp TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_published_timestamp ON published_news(timestamp);
+
+        CREATE TABLE IF NOT EXISTS statistics (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path: str, data_dir: str = None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+
+        if data_dir:
+            self.migrate_from_json(data_dir)
+
+    def migrate_from_json(self, data_dir: str):
+        """Однократно переносит данные из JSON-файлов в базу"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if row:
+            return
+
+        # Исходные файлы не меняются: перенос только читает их
+        legacy = JsonStorage(data_dir, read_only=True)
+        pending_news = legacy.load_pending() if legacy.has_pending() else []
+        published_news = legacy.load_published() if legacy.has_published() else []
+        stats = legacy.load_statistics() if os.path.exists(legacy.statistics_file) else None
+        legacy.close()
+
+        with self._lock, self._conn:
+            for news in pending_news:
+                self._insert_pending(news)
+            for news in published_news:
+                self._insert_published(news)
+            if stats:
+                self._write_statistics(stats)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (datetime.now().isoformat(),)
+            )
+
+        logger.info(
+            f"Перенесено из JSON: {len(pending_news)} на модерации, "
+            f"{len(published_news)} опубликованных"
+        )
+
+    def _insert_pending(self, news: Dict):
+        if not news.get('link'):
+            logger.warning(f"Пропущена новость на модерации без ссылки: {news}")
+            return
+        self._conn.execute(
+            "INSERT OR IGNORE INTO pending_news (news_id, link, timestamp, data) VALUES (?, ?, ?, ?)",
+            (news.get('id'), news['link'], news.get('timestamp'), json.dumps(news, ensure_ascii=False))
+        )
+
+    def _insert_published(self, news: Dict):
+        if not news.get('link'):
+            logger.warning(f"Пропущена опубликованная новость без ссылки: {news}")
+            return
+        self._conn.execute(
+            "INSERT OR IGNORE INTO published_news (link, timestamp, data) VALUES (?, ?, ?)",
+            (news['link'], news.get('timestamp'), json.dumps(news, ensure_ascii=False))
+        )
+
+    def _write_statistics(self, stats: Dict):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO statistics (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in stats.items()]
+        )
+
+    def load_pending(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM pending_news ORDER BY row_id").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def reserve_pending_id(self) -> int:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_pending_id'").fetchone()
+            if row is None:
+                # Без счетчика продолжаем после самого большого id на модерации
+                row = self._conn.execute("SELECT COALESCE(MAX(news_id), -1) + 1 FROM pending_news").fetchone()
+            news_id = int(row[0])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_pending_id', ?)",
+                (str(news_id + 1),)
+            )
+        return news_id
+
+    def get_pending(self, news_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM pending_news WHERE news_id = ? ORDER BY row_id LIMIT 1", (news_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add_pending(self, news: Dict):
+        with self._lock, self._conn:
+            self._insert_pending(news)
+
+    def update_pending(self, news: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pending_news SET data = ? WHERE news_id = ? AND link = ?",
+                (json.dumps(news, ensure_ascii=False), news.get('id'), news['link'])
+            )
+
+    def remove_pending(self, news_id: int):
+        with self._lock, self._conn:
+            # У старых записей id могли повторяться: удаляем ту же, что вернул get_pending
+            self._conn.execute(
+                "DELETE FROM pending_news WHERE row_id = "
+                "(SELECT row_id FROM pending_news WHERE news_id = ? ORDER BY row_id LIMIT 1)",
+                (news_id,)
+            )
+
+    def count_pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_news").fetchone()[0]
+
+    def load_published(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM published_news ORDER BY row_id").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def add_published(self, news: Dict):
+        with self._lock, self._conn:
+            self._insert_published(news)
+
+    def count_published(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM published_news").fetchone()[0]
+
+    def published_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        # ISO-строки одного формата сравниваются как время, поэтому работает индекс по timestamp;
+        # точная проверка каждой записи - уже только внутри окна
+        query = "SELECT timestamp, data FROM published_news WHERE timestamp IS NOT NULL"
+        params = []
+        if start is not None:
+            query += " AND timestamp >= ?"
+            params.append(start.isoformat())
+        if end is not None:
+            query += " AND timestamp < ?"
+            params.append(end.isoformat())
+        query += " ORDER BY timestamp"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        result = []
+        for timestamp, data in rows:
+            moment = parse_timestamp(timestamp)
+            if moment is None:
+                continue
+            if (start is None or moment >= start) and (end is None or moment < end):
+                result.append(json.loads(data))
+        return result
+
+    def load_links(self) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT link FROM pending_news UNION SELECT link FROM published_news"
+            ).fetchall()
+        return {link for link, in rows}
+
+    def load_pending_links(self) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT link FROM pending_news").fetchall()
+        return {link for link, in rows}
+
+    def iter_published_links(self, batch_size: int = 10000) -> Iterator[str]:
+        # Читаем порциями по row_id, чтобы не держать блокировку и всю историю в памяти
+        last_row_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT row_id, link FROM published_news WHERE row_id > ? ORDER BY row_id LIMIT ?",
+                    (last_row_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for _, link in rows:
+                yield link
+            last_row_id = rows[-1][0]
+
+    def load_recent_published_links(self, limit: int) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT link FROM published_news ORDER BY row_id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [link for link, in reversed(rows)]
+
+    def load_statistics(self) -> Dict:
+        stats = default_statistics()
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM statistics").fetchall()
+        stats.update((key, json.loads(value)) for key, value in rows)
+        return stats
+
+    def save_statistics(self, stats: Dict):
+        with self._lock, self._conn:
+            self._write_statistics(stats)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def create_storage(data_dir: str) -> NewsStorage:
+    """Создает хранилище согласно STORAGE_BACKEND"""
+    if STORAGE_BACKEND == 'json':
+        return JsonStorage(data_dir)
+    return SqliteStorage(DATABASE_FILE, data_dir)
@@ -1,169 +1,136 @@
 import asyncio
-import json
-import os
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-from telegram.error import TelegramError
+from telegram.error import BadRequest, NetworkError, TelegramError
 from news_parser import NewsParser
-from config import BOT_TOKEN, MODERATION_GROUP_ID, CHANNEL_ID, CHECK_INTERVAL
+from storage import create_storage, pending_status, PENDING, PUBLISHING, PUBLISHED
+from async_storage import AsyncStorage
+from link_index import LinkIndex
+from send_queue import SendQueue
+from statistics_counters import StatisticsCounters
+from near_duplicates import NearDuplicateDetector, add_duplicate
+from source_health import HALF_OPEN
+from time_index import parse_timestamp
+from config import (
+    BOT_TOKEN, MODERATION_GROUP_ID, CHANNEL_ID, STATS_FLUSH_INTERVAL, MODERATION_DIGEST_SIZE,
+    POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_TICK_SECONDS, UPDATE_WORKERS, DEDUP_RECENT_LINKS,
+    BOT_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN,
+    NEAR_DUPLICATES_ENABLED, NEAR_DUPLICATES_THRESHOLD, NEAR_DUPLICATES_WINDOW_HOURS,
+    NEAR_DUPLICATES_BANDS, NEAR_DUPLICATES_ROWS
+)
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Заголовок дайджеста; по нему дайджест узнается в нажатой кнопке
+DIGEST_TITLE = "Новости для модерации"
+# Максимальная длина текста сообщения Telegram
+MESSAGE_LIMIT = 4096
+
 class TelegramNewsBot:
-    def __init__(self):
+    def __init__(self, updates_only: bool = False):
+        # updates_only - только обработка обновлений (функция-вебхук): без парсера,
+        # индекса ссылок, восстановления публикаций и поиска похожих новостей
         self.bot = Bot(token=BOT_TOKEN)
-        self.news_parser = NewsParser()
+        # Все сообщения уходят через очередь с учетом лимитов Telegram
+        self.sender = SendQueue(self.bot)
+        # Изменения одного дайджеста (отметки разобранных новостей) выполняются по одному:
+        # message_id дайджеста -> (блокировка, число ожидающих)
+        self._digest_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+        # Идущие циклы проверки (у каждого свои источники) и ссылки, которые сейчас
+        # отправляются на модерацию, чтобы параллельные циклы не отправили их дважды
+        self._cycles = set()
+        self._sending_links = set()
+        # Блокировки отдельных новостей: id -> (блокировка, число ожидающих)
+        self._news_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+        self.news_parser = None if updates_only else NewsParser()
         self.data_dir = 'data'
-        self.pending_news_file = os.path.join(self.data_dir, 'pending_news.json')
-        self.published_news_file = os.path.join(self.data_dir, 'published_news.json')
-        self.statistics_file = os.path.join(self.data_dir, 'statistics.json')
+        # Хранилище новостей и статистики (SQLite или JSON-файлы)
+        self.storage = create_storage(self.data_dir)
+        # Обработчики обращаются к хранилищу через асинхронный фасад
+        self.db = AsyncStorage(self.storage)
+        # Счетчики статистики живут в памяти и сбрасываются на диск по таймеру
+        self.statistics = StatisticsCounters(self.storage)
+        self.link_index = None
+        self.near_duplicates = None
+        if updates_only:
+            # Опубликованные ссылки индекс догонит по хранилищу при полном запуске
+            return
         
-        # Создаем папку data если не существует
-        os.makedirs(self.data_dir, exist_ok=True)
+        # Индекс обработанных ссылок загружается один раз и обновляется на месте
+        self.link_index = LinkIndex.load(self.storage)
+        logger.info(f"Загружено {len(self.link_index)} обработанных ссылок")
+        self.recover_publishing()
+        # Похожие новости разных источников склеиваются в одну карточку
+        if NEAR_DUPLICATES_ENABLED:
+            self.near_duplicates = NearDuplicateDetector(
+                NEAR_DUPLICATES_BANDS, NEAR_DUPLICATES_ROWS,
+                NEAR_DUPLICATES_THRESHOLD, NEAR_DUPLICATES_WINDOW_HOURS
+            )
+            self.load_recent_signatures()
         
     def load_pending_news(self) -> List[Dict]:
         """Загружает список новостей на модерации"""
-        if os.path.exists(self.pending_news_file):
-            try:
-                with open(self.pending_news_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Ошибка при загрузке pending_news: {e}")
-                return []
-        return []
-    
-    def save_pending_news(self, news_list: List[Dict]):
-        """Сохраняет список новостей на модерации"""
-        try:
-            with open(self.pending_news_file, 'w', encoding='utf-8') as f:
-                json.dump(news_list, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении pending_news: {e}")
+        return self.storage.load_pending()
     
     def load_published_news(self) -> List[Dict]:
         """Загружает список уже опубликованных новостей"""
-        if os.path.exists(self.published_news_file):
-            try:
-                with open(self.published_news_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Обрабатываем как старые записи (строки), так и новые (объекты)
-                    result = []
-                    for item in data:
-                        if isinstance(item, str):
-                            # Старый формат - только ссылка
-                            result.append({'link': item})
-                        elif isinstance(item, dict):
-                            # Новый формат - полный объект
-                            result.append(item)
-                    return result
-            except Exception as e:
-                logger.error(f"Ошибка при загрузке published_news: {e}")
-                return []
-        else:
-            # Создаем файл если не существует
-            self.save_published_news([])
-            return []
-    
-    def save_published_news(self, published_news: List[Dict]):
-        """Сохраняет список опубликованных новостей"""
-        try:
-            with open(self.published_news_file, 'w', encoding='utf-8') as f:
-                json.dump(published_news, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении published_news: {e}")
+        return self.storage.load_published()
     
     def load_statistics(self) -> Dict:
         """Загружает статистику"""
-        if os.path.exists(self.statistics_file):
-            try:
-                with open(self.statistics_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Ошибка при загрузке статистики: {e}")
-        
-        return {
-            'parsed_today': 0,
-            'published_today': 0,
-            'rejected_today': 0,
-            'total_parsed': 0,
-            'total_published': 0,
-            'total_rejected': 0,
-            'last_reset_date': datetime.now().strftime('%Y-%m-%d')
-        }
+        return self.statistics.snapshot()
     
     def save_statistics(self, stats: Dict):
         """Сохраняет статистику"""
-        try:
-            with open(self.statistics_file, 'w', encoding='utf-8') as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении статистики: {e}")
+        self.statistics.replace(stats)
     
     def update_statistics(self, action: str, count: int = 1):
         """Обновляет статистику"""
-        stats = self.load_statistics()
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        # Сбрасываем дневную статистику если новый день
-        if stats['last_reset_date'] != today:
-            stats['parsed_today'] = 0
-            stats['published_today'] = 0
-            stats['rejected_today'] = 0
-            stats['last_reset_date'] = today
-        
-        if action == 'parsed':
-            stats['parsed_today'] += count
-            stats['total_parsed'] += count
-        elif action == 'published':
-            stats['published_today'] += count
-            stats['total_published'] += count
-        elif action == 'rejected':
-            stats['rejected_today'] += count
-            stats['total_rejected'] += count
-        
-        self.save_statistics(stats)
-    
-    def get_processed_links(self) -> set:
-        """Получает множество уже обработанных ссылок"""
-        processed_links = set()
-        
-        # Добавляем ссылки из pending_news
-        for news in self.load_pending_news():
-            if 'link' in news:
-                processed_links.add(news['link'])
-        
-        # Добавляем ссылки из published_news
-        for news in self.load_published_news():
-            if isinstance(news, dict) and 'link' in news:
-                processed_links.add(news['link'])
-        
-        return processed_links
+        self.statistics.increment(action, count)
+    
+    async def flush_statistics(self, context: ContextTypes.DEFAULT_TYPE = None):
+        """Сохраняет накопленные счетчики статистики на диск"""
+        await self.db.write('statistics', self.statistics.flush)
+    
+    async def shutdown(self, application: Application = None):
+        """Сохраняет состояние бота при остановке"""
+        await self.flush_statistics()
+        if self.link_index is not None:
+            self.link_index.save()
+        await self.db.close()
+    
+    def get_processed_links(self) -> LinkIndex:
+        """Получает индекс уже обработанных ссылок"""
+        return self.link_index
+    
+    def load_recent_signatures(self):
+        """Заполняет индекс похожих новостей новостями на модерации и недавно опубликованными"""
+        from datetime import timedelta
+        since = datetime.now() - timedelta(hours=NEAR_DUPLICATES_WINDOW_HOURS)
+        for news in self.storage.published_since(since) + self.load_pending_news():
+            moment = parse_timestamp(news.get('timestamp'))
+            self.near_duplicates.remember(news, moment.timestamp() if moment else None)
+    
+    def news_links(self, news: Dict) -> List[str]:
+        """Ссылка новости и ссылки склеенных с ней похожих новостей"""
+        return [news['link']] + [duplicate['link'] for duplicate in news.get('duplicates', [])]
     
     async def generate_report(self, period_hours: int = 24) -> str:
         """Генерирует отчет за указанный период"""
         stats = self.load_statistics()
-        published_news = self.load_published_news()
         
         # Получаем время начала периода
         from datetime import timedelta
         now = datetime.now()
         period_start = now - timedelta(hours=period_hours)
         
-        # Фильтруем опубликованные новости за период (если есть timestamp)
-        recent_published = []
-        try:
-            for news in published_news:
-                if isinstance(news, dict) and 'timestamp' in news:
-                    news_time = datetime.fromisoformat(news['timestamp'])
-                    if news_time >= period_start:
-                        recent_published.append(news)
-        except:
-            # Если нет timestamp, показываем все
-            recent_published = published_news[-10:]  # Последние 10
+        # Опубликованные новости за период; записи без корректного timestamp пропускаются
+        recent_published = await self.db.published_since(period_start)
         
         report = f"<b>ОТЧЕТ ЗА ПОСЛЕДНИЕ {period_hours} ЧАСОВ</b>\n\n"
         report += f"<b>Спарсено новостей:</b> {stats['parsed_today']}\n"
@@ -190,81 +157,387 @@ class TelegramNewsBot:
         
         return report
     
-    async def check_for_new_news(self):
-        """Проверяет новые новости и отправляет на модерацию"""
-        try:
-            logger.info("Проверяем новые новости...")
-            all_news = self.news_parser.get_all_news()
-            processed_links = self.get_processed_links()
-            
+    async def iter_new_news(self, parsers: Optional[List] = None) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """Выдает новые (еще не обработанные) новости по мере готовности источников"""
+        processed_links = self.get_processed_links()
+        # Одна и та же ссылка может встретиться у нескольких источников за цикл
+        seen_in_cycle = set()
+        
+        async for source_name, news_list in self.news_parser.iter_news(processed_links, parsers):
             new_news = []
-            for news in all_news:
-                if news['link'] not in processed_links:
+            for news in news_list:
+                if news['link'] not in processed_links and news['link'] not in seen_in_cycle:
                     new_news.append(news)
+                    seen_in_cycle.add(news['link'])
                 else:
                     logger.debug(f"ДУБЛЬ: {news['title']}")
             
             if new_news:
-                logger.info(f"Найдено {len(new_news)} новых новостей")
-                await self.send_news_for_moderation(new_news)
+                logger.info(f"Найдено {len(new_news)} новых новостей с {source_name}")
+                yield source_name, new_news
+    
+    async def check_for_new_news(self, parsers: Optional[List] = None):
+        """Проверяет новые новости источников (по умолчанию всех) и отправляет на модерацию"""
+        try:
+            logger.info("Проверяем новые новости...")
+            # Новости быстрого источника уходят на модерацию, пока медленные еще загружаются
+            total_new = 0
+            async for source_name, new_news in self.iter_new_news(parsers):
                 self.update_statistics('parsed', len(new_news))
+                total_new += len(new_news)
+                
+                if self.near_duplicates:
+                    new_news, earlier = self.near_duplicates.cluster(new_news)
+                    if earlier:
+                        new_news += await self.attach_duplicates(earlier)
+                
+                if not await self.send_news_for_moderation(new_news):
+                    # Неотправленные новости не попали в индекс ссылок; чтобы их не
+                    # скрыл ответ 304 или тот же хеш, страницу разберем заново
+                    self.news_parser.discard_validators(source_name)
+            
+            if total_new:
+                logger.info(f"Всего найдено {total_new} новых новостей")
             else:
                 logger.info("Новых новостей не найдено")
+            
+            # Публикации с прошлого цикла попадают в файл фильтра ссылок
+            await asyncio.get_running_loop().run_in_executor(None, self.link_index.save)
                 
         except Exception as e:
             logger.error(f"Ошибка при проверке новостей: {e}")
     
-    async def send_news_for_moderation(self, news_list: List[Dict]):
-        """Отправляет новости на модерацию в группу"""
-        try:
-            pending_news = self.load_pending_news()
-            processed_links = self.get_processed_links()
-            
-            new_news_count = 0
-            
-            for news in news_list:
-                if news['link'] in processed_links:
-                    logger.debug(f"ДУБЛЬ: {news['title']}")
-                    continue
-                
-                # Создаем клавиатуру с кнопками одобрения/отклонения
-                keyboard = [
-                    [
-                        InlineKeyboardButton("Одобрить", callback_data=f"approve_{len(pending_news)}"),
-                        InlineKeyboardButton("Отклонить", callback_data=f"reject_{len(pending_news)}")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                # Формируем сообщение
-                message_text = f"<b>Новая новость для модерации:</b>\n\n"
-                message_text += f"<b>Заголовок:</b> {news['title']}\n"
-                message_text += f"<b>Источник:</b> {news['source']}\n"
-                message_text += f"<b>Ссылка:</b> {news['link']}\n\n"
-                message_text += f"<b>Канал:</b> {CHANNEL_ID}"
-                
-                # Отправляем в группу модерации
-                await self.bot.send_message(
+    async def poll_sources(self, context: ContextTypes.DEFAULT_TYPE = None):
+        """Запускает проверку источников, которым подошел срок по расписанию.
+        
+        Источник, который еще загружается, в новый цикл не попадает, а остальные
+        не ждут завершения чужих циклов.
+        """
+        parsers = self.news_parser.due_parsers()
+        if not parsers:
+            return
+        task = asyncio.create_task(self.check_for_new_news(parsers))
+        self._cycles.add(task)
+        task.add_done_callback(self._cycles.discard)
+    
+    def publishing_keyboard(self, news_id: int) -> InlineKeyboardMarkup:
+        """Кнопки для новости, результат публикации которой неизвестен"""
+        keyboard = [
+            [
+                InlineKeyboardButton("Есть в канале", callback_data=f"confirm_{news_id}"),
+                InlineKeyboardButton("Нет в канале", callback_data=f"reset_{news_id}")
+            ]
+        ]
+        return InlineKeyboardMarkup(keyboard)
+    
+    def moderation_keyboard(self, news_id: int) -> InlineKeyboardMarkup:
+        """Создает клавиатуру с кнопками одобрения/отклонения"""
+        keyboard = [
+            [
+                InlineKeyboardButton("Одобрить", callback_data=f"approve_{news_id}"),
+                InlineKeyboardButton("Отклонить", callback_data=f"reject_{news_id}")
+            ]
+        ]
+        return InlineKeyboardMarkup(keyboard)
+    
+    def format_moderation_message(self, news: Dict) -> str:
+        """Формирует текст карточки модерации"""
+        message_text = f"<b>Новая новость для модерации:</b>\n\n"
+        message_text += f"<b>Заголовок:</b> {news['title']}\n"
+        message_text += f"<b>Источник:</b> {news['source']}\n"
+        message_text += f"<b>Ссылка:</b> {news['link']}\n\n"
+        if news.get('duplicates'):
+            message_text += f"<b>Также пишут:</b>\n"
+            for duplicate in news['duplicates']:
+                message_text += f"• {duplicate['source']}: {duplicate['link']}\n"
+            message_text += "\n"
+        message_text += f"<b>Канал:</b> {CHANNEL_ID}"
+        return message_text
+    
+    async def attach_duplicates(self, duplicates: List) -> List[Dict]:
+        """Дописывает похожие новости в карточки, еще ждущие модерации.
+        
+        Возвращает новости, чьи карточки уже разобраны или публикуются: они
+        отправляются на модерацию отдельно.
+        """
+        pending_ids = {news['link']: news['id'] for news in await self.db.load_pending()}
+        changed = {}
+        orphans = []
+        for news, card_link in duplicates:
+            card = None
+            if card_link in pending_ids:
+                # Карточку перечитываем под блокировкой, чтобы не затереть смену ее статуса
+                def attach(card: Dict, news=news, card_link=card_link) -> bool:
+                    if card['link'] != card_link or pending_status(card) != PENDING:
+                        return False
+                    add_duplicate(card, news)
+                    return True
+                card = await self.db.modify_pending(pending_ids[card_link], attach)
+            
+            if card is None:
+                orphans.append(news)
+                continue
+            # Ссылка обработана вместе с карточкой
+            self.link_index.add(news['link'])
+            changed[card_link] = card
+        
+        for card in changed.values():
+            if 'message_id' not in card:
+                continue
+            if card.get('digest'):
+                async with self.digest_lock(card['digest']):
+                    await self.edit_digest(card['digest'], await self.load_digest_pending(card['digest']))
+                continue
+            try:
+                await self.sender.edit_message_text(
                     chat_id=MODERATION_GROUP_ID,
-                    text=message_text,
+                    message_id=card['message_id'],
+                    text=self.format_moderation_message(card),
                     parse_mode='HTML',
-                    reply_markup=reply_markup
+                    reply_markup=self.moderation_keyboard(card['id'])
                 )
-                
-                # Добавляем в список ожидающих модерации
-                news['id'] = len(pending_news)
-                news['timestamp'] = datetime.now().isoformat()
-                pending_news.append(news)
-                new_news_count += 1
-                
-                # Добавляем ссылку в список обработанных
-                processed_links.add(news['link'])
-            
-            self.save_pending_news(pending_news)
-            logger.info(f"Отправлено {new_news_count} новых новостей на модерацию")
-            
+            except TelegramError as e:
+                logger.error(f"Ошибка при обновлении карточки модерации: {e}")
+        
+        return orphans
+    
+    def format_digest(self, digest: Dict, pending: Dict[int, Dict],
+                      with_duplicates: bool = True) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        """Формирует текст и кнопки дайджеста; разобранные новости помечаются, их кнопки убираются.
+        
+        Если текст не помещается в MESSAGE_LIMIT, ссылки похожих новостей сворачиваются в счетчик.
+        """
+        message_text = f"<b>{DIGEST_TITLE} ({len(digest['items'])}):</b>\n\n"
+        keyboard = []
+        for number, item in enumerate(digest['items'], 1):
+            news = pending.get(item['id'])
+            if news is None:
+                action = digest.get('resolved', {}).get(str(item['id']))
+                mark = {'approve': '✅', 'reject': '❌'}.get(action, '☑️')
+                message_text += f"{mark} <s>{number}. {item['title']}</s>\n\n"
+                continue
+            
+            if pending_status(news) == PUBLISHING:
+                # Публикация идет или прервалась: модератор может отметить, есть ли новость в канале
+                message_text += f"⏳ {number}. {item['title']}\n\n"
+                keyboard.append([
+                    InlineKeyboardButton(f"Есть в канале {number}", callback_data=f"confirm_{item['id']}"),
+                    InlineKeyboardButton(f"Нет в канале {number}", callback_data=f"reset_{item['id']}")
+                ])
+                continue
+            
+            message_text += f"<b>{number}. {news['title']}</b>\n"
+            message_text += f"{news['source']}: {news['link']}\n"
+            if with_duplicates:
+                for duplicate in news.get('duplicates', []):
+                    message_text += f"• {duplicate['source']}: {duplicate['link']}\n"
+            elif news.get('duplicates'):
+                message_text += f"• и еще {len(news['duplicates'])} похожих\n"
+            message_text += "\n"
+            keyboard.append([
+                InlineKeyboardButton(f"Одобрить {number}", callback_data=f"approve_{item['id']}"),
+                InlineKeyboardButton(f"Отклонить {number}", callback_data=f"reject_{item['id']}")
+            ])
+        message_text += f"<b>Канал:</b> {CHANNEL_ID}"
+        if with_duplicates and len(message_text) > MESSAGE_LIMIT:
+            return self.format_digest(digest, pending, with_duplicates=False)
+        return message_text, InlineKeyboardMarkup(keyboard) if keyboard else None
+    
+    def digest_length(self, news_list: List[Dict]) -> int:
+        """Длина текста дайджеста из news_list (id для подсчета не нужны)"""
+        digest = {'items': [{'id': i, 'title': news['title']} for i, news in enumerate(news_list)]}
+        message_text, _ = self.format_digest(digest, dict(enumerate(news_list)), with_duplicates=False)
+        return len(message_text)
+    
+    def digest_batches(self, news_list: List[Dict]) -> List[List[Dict]]:
+        """Делит новости на сообщения: до MODERATION_DIGEST_SIZE новостей и не длиннее MESSAGE_LIMIT"""
+        batch_size = max(MODERATION_DIGEST_SIZE, 1)
+        batches = []
+        batch = []
+        for news in news_list:
+            candidate = batch + [news]
+            if batch and (len(candidate) > batch_size or self.digest_length(candidate) > MESSAGE_LIMIT):
+                batches.append(batch)
+                candidate = [news]
+            batch = candidate
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    async def load_digest_pending(self, digest: Dict) -> Dict[int, Dict]:
+        """Загружает еще не разобранные новости дайджеста"""
+        pending = {}
+        for item in digest['items']:
+            news = await self.db.get_pending(item['id'])
+            if news is not None:
+                pending[item['id']] = news
+        return pending
+    
+    async def edit_digest(self, digest: Dict, pending: Dict[int, Dict]):
+        """Обновляет сообщение дайджеста на месте"""
+        message_text, reply_markup = self.format_digest(digest, pending)
+        try:
+            await self.sender.edit_message_text(
+                chat_id=MODERATION_GROUP_ID,
+                message_id=digest['message_id'],
+                text=message_text,
+                parse_mode='HTML',
+                reply_markup=reply_markup
+            )
+        except TelegramError as e:
+            logger.error(f"Ошибка при обновлении дайджеста: {e}")
+    
+    async def resolve_digest_item(self, news: Dict, action: str):
+        """Отмечает новость дайджеста разобранной и обновляет сообщение"""
+        async with self.digest_lock(news['digest']):
+            digest = news['digest']
+            resolved = dict(digest.get('resolved', {}))
+            resolved[str(news['id'])] = action
+            
+            # Отметки хранятся в каждой оставшейся новости, чтобы их видел следующий модератор
+            pending = await self.load_digest_pending(digest)
+            for sibling in pending.values():
+                resolved.update(sibling['digest'].get('resolved', {}))
+            def mark(sibling: Dict):
+                sibling['digest']['resolved'] = resolved
+            for sibling_id in pending:
+                await self.db.modify_pending(sibling_id, mark)
+            
+            digest['resolved'] = resolved
+            await self.edit_digest(digest, pending)
+    
+    async def record_pending(self, news: Dict, message_id: int):
+        """Сразу записывает отправленную новость, чтобы она не ушла повторно"""
+        news['message_id'] = message_id
+        news['timestamp'] = datetime.now().isoformat()
+        await self.db.add_pending(news)
+        
+        # Добавляем ссылки в индекс обработанных
+        for link in self.news_links(news):
+            self.link_index.add(link)
+        # Похожие новости следующих циклов склеиваются только с отправленными карточками
+        if self.near_duplicates:
+            self.near_duplicates.remember(news)
+    
+    async def send_card(self, news: Dict) -> int:
+        """Отправляет новость отдельной карточкой; возвращает число отправленных новостей"""
+        # id не повторяются, поэтому старая кнопка не сработает на чужой новости
+        news['id'] = await self.db.reserve_pending_id()
+        try:
+            message = await self.sender.send_message(
+                chat_id=MODERATION_GROUP_ID,
+                text=self.format_moderation_message(news),
+                parse_mode='HTML',
+                reply_markup=self.moderation_keyboard(news['id'])
+            )
         except TelegramError as e:
-            logger.error(f"Ошибка при отправке на модерацию: {e}")
+            logger.error(f"Ошибка при отправке на модерацию: {news['title']}: {e}")
+            return 0
+        
+        await self.record_pending(news, message.message_id)
+        return 1
+    
+    async def send_digest(self, news_list: List[Dict]) -> int:
+        """Отправляет несколько новостей одним сообщением с кнопками для каждой"""
+        for news in news_list:
+            news['id'] = await self.db.reserve_pending_id()
+        digest = {
+            'items': [{'id': news['id'], 'title': news['title']} for news in news_list],
+            'resolved': {}
+        }
+        message_text, reply_markup = self.format_digest(digest, {news['id']: news for news in news_list})
+        
+        try:
+            message = await self.sender.send_message(
+                chat_id=MODERATION_GROUP_ID,
+                text=message_text,
+                parse_mode='HTML',
+                reply_markup=reply_markup
+            )
+        except TelegramError as e:
+            logger.error(f"Ошибка при отправке дайджеста на модерацию: {e}")
+            return 0
+        
+        digest['message_id'] = message.message_id
+        for news in news_list:
+            news['digest'] = digest
+            await self.record_pending(news, message.message_id)
+        return len(news_list)
+    
+    async def send_news_for_moderation(self, news_list: List[Dict]) -> bool:
+        """Отправляет новости на модерацию в группу; False, если часть сообщений не отправлена"""
+        processed_links = self.get_processed_links()
+        
+        fresh_news = []
+        for news in news_list:
+            if news['link'] in processed_links or news['link'] in self._sending_links:
+                logger.debug(f"ДУБЛЬ: {news['title']}")
+                continue
+            fresh_news.append(news)
+        
+        # Ссылка попадает в индекс обработанных только после отправки; до тех пор
+        # ее не возьмет параллельный цикл другого источника
+        sending = {news['link'] for news in fresh_news}
+        self._sending_links |= sending
+        try:
+            # В режиме дайджеста до MODERATION_DIGEST_SIZE новостей уходят одним сообщением;
+            # ошибка одного сообщения не прерывает остальные
+            new_news_count = 0
+            failed = False
+            for batch in self.digest_batches(fresh_news):
+                if len(batch) == 1:
+                    sent = await self.send_card(batch[0])
+                else:
+                    sent = await self.send_digest(batch)
+                new_news_count += sent
+                failed = failed or not sent
+        finally:
+            self._sending_links -= sending
+        
+        logger.info(f"Отправлено {new_news_count} новых новостей на модерацию")
+        return not failed
+    
+    def recover_publishing(self):
+        """Разбирает новости, чья публикация прервалась остановкой бота"""
+        stuck = [news for news in self.storage.load_pending() if pending_status(news) == PUBLISHING]
+        if not stuck:
+            return
+        
+        published_links = set(self.storage.load_recent_published_links(DEDUP_RECENT_LINKS))
+        for news in stuck:
+            if news['link'] in published_links:
+                # Публикация завершилась, не успели только убрать новость с модерации
+                self.storage.remove_pending(news['id'])
+            else:
+                # Неизвестно, дошло ли сообщение до канала: повторно не публикуем,
+                # модератор отмечает результат кнопками при следующем нажатии на карточку
+                logger.warning(f"Публикация новости {news['id']} прервана, проверьте канал: {news['title']}")
+    
+    @staticmethod
+    @asynccontextmanager
+    async def keyed_lock(locks: Dict[int, Tuple[asyncio.Lock, int]], key: int):
+        """Блокировка по ключу; запись удаляется, когда ее больше никто не ждет"""
+        lock, waiters = locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        locks[key] = (lock, waiters + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, waiters = locks[key]
+            if waiters == 1:
+                del locks[key]
+            else:
+                locks[key] = (lock, waiters - 1)
+    
+    def news_lock(self, news_id: int):
+        """Нажатия на кнопки одной новости обрабатываются по очереди, разных - параллельно"""
+        return self.keyed_lock(self._news_locks, news_id)
+    
+    def digest_lock(self, digest: Dict):
+        """Изменения одного дайджеста идут по очереди и не задерживают другие дайджесты"""
+        return self.keyed_lock(self._digest_locks, digest['message_id'])
     
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обрабатывает нажатия на кнопки модерации"""
@@ -274,55 +547,159 @@ class TelegramNewsBot:
         try:
             action, news_id = query.data.split('_', 1)
             news_id = int(news_id)
-            
-            pending_news = self.load_pending_news()
-            
-            # Находим новость по ID
-            news_to_process = None
-            for i, news in enumerate(pending_news):
-                if news.get('id') == news_id:
-                    news_to_process = news
-                    break
-            
-            if not news_to_process:
-                await query.edit_message_text("❌ Новость не найдена")
+            handlers = {
+                "approve": self.approve_news,
+                "reject": self.reject_news,
+                "confirm": self.confirm_published,
+                "reset": self.reset_publishing
+            }
+            if action not in handlers:
                 return
             
-            if action == "approve":
-                # Одобряем новость
-                await self.publish_news(news_to_process)
-                
-                # Удаляем из списка ожидающих
-                pending_news = [news for news in pending_news if news.get('id') != news_id]
-                self.save_pending_news(pending_news)
-                
-                # Добавляем новость в список опубликованных
-                news_to_process['timestamp'] = datetime.now().isoformat()
-                published_news = self.load_published_news()
-                published_news.append(news_to_process)
-                self.save_published_news(published_news)
-                
-                # Обновляем статистику
-                self.update_statistics('published')
-                
-                await query.edit_message_text("✅ Новость одобрена и опубликована!")
-                
-            elif action == "reject":
-                # Отклоняем новость
-                pending_news = [news for news in pending_news if news.get('id') != news_id]
-                self.save_pending_news(pending_news)
-                
-                # Обновляем статистику
-                self.update_statistics('rejected')
-                
-                await query.edit_message_text("❌ Новость отклонена")
+            async with self.news_lock(news_id):
+                await handlers[action](query, news_id)
                 
         except Exception as e:
             logger.error(f"Ошибка при обработке callback: {e}")
-            await query.edit_message_text("Произошла ошибка")
+            # Дайджест не заменяем: кнопки остальных новостей должны остаться
+            if not self.is_digest_message(query):
+                await query.edit_message_text("Произошла ошибка")
     
-    async def publish_news(self, news: Dict):
-        """Публикует новость в канал"""
+    def is_digest_message(self, query) -> bool:
+        """Нажата ли кнопка в сообщении-дайджесте"""
+        return bool(query.message and (query.message.text or '').startswith(DIGEST_TITLE))
+    
+    async def report_unavailable(self, query, news_id: int):
+        """Сообщает, что новость уже разобрана или ее публикация прервалась"""
+        news = await self.db.get_pending(news_id)
+        # Нажатия на новость идут по очереди, значит ее публикация прервалась
+        interrupted = news is not None and pending_status(news) == PUBLISHING
+        
+        if self.is_digest_message(query):
+            # В дайджесте остальные новости еще ждут решения; прерванную публикацию
+            # показываем с кнопками проверки канала
+            if interrupted and news.get('digest'):
+                async with self.digest_lock(news['digest']):
+                    await self.edit_digest(news['digest'], await self.load_digest_pending(news['digest']))
+            return
+        
+        if interrupted:
+            await self.ask_publish_result(query, news)
+        else:
+            await query.edit_message_text("❌ Новость не найдена")
+    
+    async def ask_publish_result(self, query, news: Dict):
+        """Просит модератора проверить канал, если неизвестно, опубликована ли новость"""
+        await query.edit_message_text(
+            self.format_moderation_message(news)
+            + "\n\n⚠️ Неизвестно, опубликована ли новость. Проверьте канал и отметьте результат",
+            parse_mode='HTML',
+            reply_markup=self.publishing_keyboard(news['id'])
+        )
+    
+    async def approve_news(self, query, news_id: int):
+        """Публикует новость; статус pending -> publishing -> published исключает повторную публикацию"""
+        news = await self.db.transition_pending(news_id, PENDING, PUBLISHING)
+        if news is None:
+            await self.report_unavailable(query, news_id)
+            return
+        
+        published = await self.publish_news(news)
+        if published is None:
+            # Сеть оборвалась после отправки: новость остается в publishing,
+            # повторно ее не публикуем, пока модератор не проверит канал
+            if news.get('digest'):
+                async with self.digest_lock(news['digest']):
+                    await self.edit_digest(news['digest'], await self.load_digest_pending(news['digest']))
+            else:
+                await self.ask_publish_result(query, news)
+            return
+        
+        if not published:
+            # Сообщение в канал не ушло: возвращаем новость на модерацию
+            await self.db.transition_pending(news_id, PUBLISHING, PENDING)
+            if news.get('digest'):
+                async with self.digest_lock(news['digest']):
+                    await self.edit_digest(news['digest'], await self.load_digest_pending(news['digest']))
+            else:
+                await query.edit_message_text(
+                    self.format_moderation_message(news) + "\n\n⚠️ Не удалось опубликовать, попробуйте еще раз",
+                    parse_mode='HTML',
+                    reply_markup=self.moderation_keyboard(news_id)
+                )
+            return
+        
+        await self.finish_publishing(query, news)
+    
+    async def finish_publishing(self, query, news: Dict):
+        """Переносит опубликованную новость в список опубликованных"""
+        # Добавляем новость в список опубликованных и только потом убираем с модерации
+        news['status'] = PUBLISHED
+        news['timestamp'] = datetime.now().isoformat()
+        await self.db.add_published(news)
+        await self.db.remove_pending(news['id'])
+        if self.link_index is not None:
+            for link in self.news_links(news):
+                self.link_index.publish(link)
+        
+        # Обновляем статистику
+        self.update_statistics('published')
+        
+        if news.get('digest'):
+            await self.resolve_digest_item(news, 'approve')
+        else:
+            await query.edit_message_text("✅ Новость одобрена и опубликована!")
+    
+    async def confirm_published(self, query, news_id: int):
+        """Модератор нашел новость в канале: завершаем прерванную публикацию"""
+        news = await self.db.get_pending(news_id)
+        if news is None or pending_status(news) != PUBLISHING:
+            await self.report_unavailable(query, news_id)
+            return
+        await self.finish_publishing(query, news)
+    
+    async def reset_publishing(self, query, news_id: int):
+        """Модератор не нашел новость в канале: возвращаем ее на модерацию"""
+        news = await self.db.transition_pending(news_id, PUBLISHING, PENDING)
+        if news is None:
+            await self.report_unavailable(query, news_id)
+            return
+        
+        if news.get('digest'):
+            async with self.digest_lock(news['digest']):
+                await self.edit_digest(news['digest'], await self.load_digest_pending(news['digest']))
+        else:
+            await query.edit_message_text(
+                self.format_moderation_message(news),
+                parse_mode='HTML',
+                reply_markup=self.moderation_keyboard(news_id)
+            )
+    
+    async def reject_news(self, query, news_id: int):
+        """Отклоняет новость, если ее еще не начали публиковать"""
+        news = await self.db.take_pending(news_id, PENDING)
+        if news is None:
+            await self.report_unavailable(query, news_id)
+            return
+        
+        if self.link_index is not None:
+            for link in self.news_links(news):
+                self.link_index.discard(link)
+        
+        # Обновляем статистику
+        self.update_statistics('rejected')
+        
+        if news.get('digest'):
+            await self.resolve_digest_item(news, 'reject')
+        else:
+            await query.edit_message_text("❌ Новость отклонена")
+    
+    async def publish_news(self, news: Dict) -> Optional[bool]:
+        """Публикует новость в канал.
+        
+        Возвращает True, если сообщение отправлено, False - если точно не отправлено,
+        None - если из-за сетевой ошибки это неизвестно.
+        """
         try:
             # Создаем короткую ссылку для отображения
             short_link = self.get_short_link(news['link'])
@@ -337,17 +714,27 @@ class TelegramNewsBot:
             message_text += f"Читать: {clickable_link}\n\n"
             message_text += f"{CHANNEL_ID}"
             
-            # Отправляем сообщение с кликабельной ссылкой
-            await self.bot.send_message(
+            # Отправляем сообщение с кликабельной ссылкой; при сетевой ошибке
+            # не повторяем - иначе новость может выйти в канале дважды
+            await self.sender.send_message(
+                retry_network=False,
                 chat_id=CHANNEL_ID,
                 text=message_text,
                 parse_mode='Markdown'
             )
             
             logger.info(f"Опубликована новость: {news['title']}")
+            return True
             
+        except BadRequest as e:
+            logger.error(f"Ошибка при публикации в канал: {e}")
+            return False
+        except NetworkError as e:
+            logger.error(f"Результат публикации неизвестен: {news['title']}: {e}")
+            return None
         except TelegramError as e:
             logger.error(f"Ошибка при публикации в канал: {e}")
+            return False
     
     def add_utm_params(self, url: str) -> str:
         """Добавляет UTM-параметры к ссылке для отслеживания трафика"""
@@ -406,16 +793,37 @@ class TelegramNewsBot:
     
     async def status_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /status"""
-        pending_news = self.load_pending_news()
-        published_links = self.load_published_news()
-        
         status_text = f"Статус бота:\n\n"
-        status_text += f"На модерации: {len(pending_news)}\n"
-        status_text += f"Опубликовано: {len(published_links)}\n"
-        status_text += f"Проверка каждые {CHECK_INTERVAL} минут"
+        status_text += f"На модерации: {await self.db.count_pending()}\n"
+        status_text += f"Опубликовано: {await self.db.count_published()}\n"
+        if self.news_parser:
+            status_text += f"Проверка источников раз в {POLL_MIN_INTERVAL:g}-{POLL_MAX_INTERVAL:g} минут:\n"
+            for parser in self.news_parser.parsers:
+                status_text += f"• {self.format_source_status(parser.source_name)}\n"
         
         await update.message.reply_text(status_text)
     
+    def format_source_status(self, source_name: str) -> str:
+        """Строка /status об источнике: интервал опроса, задержки, ошибки и отключение"""
+        health = self.news_parser.health.snapshot(source_name)
+        if health['retry_at'] is not None:
+            retry_at = datetime.fromtimestamp(health['retry_at']).strftime('%H:%M')
+            return (
+                f"{source_name}: отключен до {retry_at} после {health['consecutive_failures']} ошибок подряд "
+                f"({(health['last_error'] or '')[:80]})"
+            )
+        
+        interval = self.news_parser.scheduler.interval(source_name) / 60
+        line = f"{source_name}: каждые {interval:.0f} мин"
+        if health['polls']:
+            line += (
+                f", p50 {health['p50']:.1f} с, p95 {health['p95']:.1f} с, "
+                f"ошибок {health['error_rate']:.0%} из {health['polls']}"
+            )
+        if health['state'] == HALF_OPEN:
+            line += ", идет пробный опрос"
+        return line
+    
     async def report_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /report"""
         try:
@@ -434,7 +842,7 @@ class TelegramNewsBot:
         """Отправляет ежедневный отчет в группу модерации"""
         try:
             report = await self.generate_report(24)
-            await self.bot.send_message(
+            await self.sender.send_message(
                 chat_id=MODERATION_GROUP_ID,
                 text=report,
                 parse_mode='HTML'
@@ -447,33 +855,77 @@ class TelegramNewsBot:
         """Периодическая проверка новостей"""
         while True:
             try:
-                await self.check_for_new_news()
-                await asyncio.sleep(CHECK_INTERVAL * 60)  # Конвертируем минуты в секунды
+                await self.poll_sources()
+                # Спим до ближайшего опроса по расписанию, но проверяем его не реже POLL_TICK_SECONDS
+                await asyncio.sleep(min(max(self.news_parser.seconds_until_due(), 1), POLL_TICK_SECONDS))
             except Exception as e:
                 logger.error(f"Ошибка в периодической проверке: {e}")
                 await asyncio.sleep(60)  # Ждем минуту перед повтором
     
-    def run(self):
-        """Запускает бота"""
-        try:
-            application = Application.builder().token(BOT_TOKEN).build()
-            
-            # Добавляем обработчики команд
-            application.add_handler(CommandHandler("start", self.start_command))
-            application.add_handler(CommandHandler("status", self.status_command))
-            application.add_handler(CommandHandler("report", self.report_command))
-            application.add_handler(CallbackQueryHandler(self.handle_callback_query))
-            
-            # Запускаем периодическую проверку новостей
+    def build_application(self, with_jobs: bool = True) -> Application:
+        """Создает приложение с обработчиками команд и (по желанию) периодическими задачами"""
+        application = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            # Медленная публикация одной новости не задерживает нажатия других модераторов
+            .concurrent_updates(UPDATE_WORKERS)
+            .post_shutdown(self.shutdown)
+            .build()
+        )
+        
+        # Добавляем обработчики команд
+        application.add_handler(CommandHandler("start", self.start_command))
+        application.add_handler(CommandHandler("status", self.status_command))
+        application.add_handler(CommandHandler("report", self.report_command))
+        application.add_handler(CallbackQueryHandler(self.handle_callback_query))
+        
+        if with_jobs:
+            # Источники опрашиваются по собственному расписанию; задача только проверяет,
+            # кому подошел срок, и запускает для них отдельный цикл
             application.job_queue.run_repeating(
-                lambda context: asyncio.create_task(self.check_for_new_news()),
-                interval=CHECK_INTERVAL * 60,
+                self.poll_sources,
+                interval=POLL_TICK_SECONDS,
                 first=10  # Первая проверка через 10 секунд
             )
             
+            # Сбрасываем счетчики статистики на диск
+            application.job_queue.run_repeating(
+                self.flush_statistics,
+                interval=STATS_FLUSH_INTERVAL,
+                first=STATS_FLUSH_INTERVAL
+            )
+        
+        return application
+    
+    def webhook_settings(self) -> Dict:
+        """Параметры встроенного HTTP-сервера вебхука (BOT_MODE=webhook)"""
+        if not WEBHOOK_URL or not WEBHOOK_SECRET_TOKEN:
+            raise ValueError("Для BOT_MODE=webhook нужны WEBHOOK_URL и WEBHOOK_SECRET_TOKEN")
+        logger.info(f"Принимаем обновления через вебхук на {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+        # Встроенный HTTP-сервер сам регистрирует вебхук и проверяет секретный токен
+        return {
+            'listen': WEBHOOK_LISTEN,
+            'port': WEBHOOK_PORT,
+            'url_path': WEBHOOK_PATH,
+            'secret_token': WEBHOOK_SECRET_TOKEN,
+            'webhook_url': f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}"
+        }
+    
+    def start_updates(self, application: Application):
+        """Получает обновления через вебхук или long polling согласно BOT_MODE"""
+        if BOT_MODE == 'webhook':
+            application.run_webhook(**self.webhook_settings())
+        else:
+            application.run_polling()
+    
+    def run(self):
+        """Запускает бота"""
+        try:
+            application = self.build_application()
+            
             # Запускаем бота
             logger.info("Запускаем бота...")
-            application.run_polling()
+            self.start_updates(application)
             
         except Exception as e:
             logger.error(f"Критическая ошибка при запуске бота: {e}")
@@ -482,32 +934,41 @@ class TelegramNewsBot:
     async def run_async(self):
         """Асинхронный запуск бота для Netlify Functions"""
         try:
-            application = Application.builder().token(BOT_TOKEN).build()
-            
-            # Добавляем обработчики команд
-            application.add_handler(CommandHandler("start", self.start_command))
-            application.add_handler(CommandHandler("status", self.status_command))
-            application.add_handler(CommandHandler("report", self.report_command))
-            application.add_handler(CallbackQueryHandler(self.handle_callback_query))
+            application = self.build_application()
             
             # Отправляем уведомление о деплое
             await self.send_deployment_notification()
             
-            # Запускаем периодическую проверку новостей
-            application.job_queue.run_repeating(
-                lambda context: asyncio.create_task(self.check_for_new_news()),
-                interval=CHECK_INTERVAL * 60,
-                first=10  # Первая проверка через 10 секунд
-            )
-            
-            # Запускаем бота
+            # Запускаем бота в уже работающем цикле событий (run_polling/run_webhook
+            # создают собственный цикл и здесь не подходят)
             logger.info("Запускаем бота асинхронно...")
-            await application.run_polling()
+            async with application:
+                await application.start()
+                if BOT_MODE == 'webhook':
+                    await application.updater.start_webhook(**self.webhook_settings())
+                else:
+                    await application.updater.start_polling()
+                try:
+                    # Работаем до отмены задачи
+                    await asyncio.Event().wait()
+                finally:
+                    await application.updater.stop()
+                    await application.stop()
+                    await self.shutdown()
             
         except Exception as e:
             logger.error(f"Критическая ошибка при асинхронном запуске бота: {e}")
             raise
     
+    async def process_webhook_update(self, data: Dict):
+        """Обрабатывает одно обновление, пришедшее в функцию-вебхук"""
+        application = self.build_application(with_jobs=False)
+        async with application:
+            await application.process_update(Update.de_json(data, application.bot))
+        
+        # Функция может завершиться сразу после ответа, поэтому состояние сохраняем здесь
+        await self.shutdown()
+    
     async def send_deployment_notification(self):
         """Отправляет уведомление о деплое в группу модерации"""
         try:
@@ -515,24 +976,22 @@ class TelegramNewsBot:
             
             # Получаем статистику
             stats = self.load_statistics()
-            pending_news = self.load_pending_news()
-            published_news = self.load_published_news()
             
             # Формируем сообщение
             message = f"🚀 <b>БОТ УСПЕШНО ЗАПУЩЕН!</b>\n\n"
             message += f"⏰ Время запуска: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
             message += f"🌐 Платформа: Netlify Functions\n"
             message += f"📊 Статистика:\n"
-            message += f"• На модерации: {len(pending_news)}\n"
-            message += f"• Опубликовано: {len(published_news)}\n"
+            message += f"• На модерации: {await self.db.count_pending()}\n"
+            message += f"• Опубликовано: {await self.db.count_published()}\n"
             message += f"• Всего спарсено: {stats['total_parsed']}\n"
             message += f"• Всего опубликовано: {stats['total_published']}\n\n"
             message += f"✅ Бот готов к работе!\n"
-            message += f"🔄 Проверка новостей каждые {CHECK_INTERVAL} минут\n"
+            message += f"🔄 Проверка новостей раз в {POLL_MIN_INTERVAL:g}-{POLL_MAX_INTERVAL:g} минут, по активности источника\n"
             message += f"📢 Канал: {CHANNEL_ID}"
             
             # Отправляем в группу модерации
-            await self.bot.send_message(
+            await self.sender.send_message(
                 chat_id=MODERATION_GROUP_ID,
                 text=message,
                 parse_mode='HTML'
@@ -0,0 +1,42 @@
+import bisect
+import logging
+from datetime import datetime
+from typing import Any, List, Optional
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Разбирает ISO-время записи; None, если его нет или оно некорректно"""
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        # Записи бота хранят местное время без пояса
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+class TimeIndex:
+    """Записи, упорядоченные по времени, с выборкой интервала через bisect"""
+    
+    def __init__(self):
+        self._keys: List[datetime] = []
+        self._items: List[Any] = []
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def add(self, moment: datetime, item: Any):
+        """Добавляет запись; для записей по возрастанию времени это O(1)"""
+        position = bisect.bisect_right(self._keys, moment)
+        self._keys.insert(position, moment)
+        self._items.insert(position, item)
+    
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Any]:
+        """Записи с start <= время < end (границы необязательны)"""
+        lo = 0 if start is None else bisect.bisect_left(self._keys, start)
+        hi = len(self._keys) if end is None else bisect.bisect_left(self._keys, end)
+        return self._items[lo:hi]
@@ -0,0 +1,4 @@
+import os
+
+# config.py требует токен при импорте; тестам настоящий токен не нужен
+os.environ.setdefault('BOT_TOKEN', '0:test')
@@ -0,0 +1,65 @@
+import pytest
+
+from html_backends import LxmlBackend, SoupBackend, etree, get_backend
+
+pytestmark = pytest.mark.skipif(etree is None, reason="lxml не установлен")
+
+PAGES = {
+    'containers': b"""
+        <html><body>
+        <article class="post"><h2><a href="/a">First story</a></h2><p>text</p></article>
+        <div class="news-item"><h3>Second story</h3><a href="/b">more</a></div>
+        </body></html>
+    """,
+    'nested': b"""
+        <div class="news-list">
+          <div class="card"><h4><span>Deep title</span></h4><a href="/c">read</a></div>
+          <div class="card"><a href="/d">Link as title</a></div>
+        </div>
+    """,
+    'headline_fallback': b"""
+        <html><body>
+        <div><h2>Plain headline</h2><a href="/e">go</a></div>
+        <a href="/f"><h3>Headline in link</h3></a>
+        <h1>Orphan headline</h1>
+        </body></html>
+    """,
+    'mixed_heading': b"""
+        <article class="post"><h2>Title<script>var x = 1;</script></h2><a href="/g">go</a></article>
+        <article class="post"><h2><!-- note -->Commented</h2><a href="/h">go</a></article>
+        <article class="post"><h2>  Spaced &amp; escaped  </h2></article>
+        <article class="post"><p>no title here</p></article>
+    """,
+    'malformed': b"""
+        <article class="post"><h2>Unclosed <p>para</h2><a href=/c>link</a>
+        <div class="item"><h3>Broken <b>bold</h3><a href="/i">x</a>
+    """,
+}
+
+FEED_PAGE = b"""
+    <html><head>
+    <link rel="stylesheet" href="/style.css">
+    <link rel="alternate" type="application/atom+xml" href="/atom.xml">
+    </head><body></body></html>
+"""
+
+def extract_all(backend, content):
+    document = backend.parse(content)
+    return [backend.extract(article) for article in backend.find_articles(document)]
+
+@pytest.mark.parametrize('name', sorted(PAGES))
+def test_lxml_backend_matches_soup_lxml(name):
+    expected = extract_all(SoupBackend('lxml', partial=False), PAGES[name])
+    assert extract_all(LxmlBackend(), PAGES[name]) == expected
+
+def test_feed_url_matches_soup_lxml():
+    soup = SoupBackend('lxml')
+    expected = soup.find_feed_url(soup.parse(FEED_PAGE))
+    assert expected == '/atom.xml'
+    backend = LxmlBackend()
+    assert backend.find_feed_url(backend.parse(FEED_PAGE)) == expected
+
+def test_default_backend_keeps_html_parser_output():
+    backend = get_backend()
+    assert isinstance(backend, SoupBackend) and backend.features == 'html.parser'
+    assert extract_all(backend, PAGES['malformed'])[0] == ('link', '/c')
@@ -0,0 +1,101 @@
+import json
+import os
+import time
+
+from journal import Journal
+from storage import apply_pending, apply_published
+
+def news(number):
+    return {'link': f'https://example.com/{number}', 'title': f'News {number}'}
+
+def links(items):
+    return [item['link'] for item in items]
+
+def open_journal(tmp_path, apply=apply_published, **kwargs):
+    return Journal(str(tmp_path / 'published_news.json'), apply, **kwargs)
+
+def write_lines(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+def test_half_written_line_is_skipped_and_terminated(tmp_path):
+    journal = open_journal(tmp_path)
+    journal.append(news(1))
+    journal.append(news(2))
+    journal.close()
+    # Сбой посреди записи: строка оборвана без перевода строки
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"link": "https://example.com/3", "ti')
+
+    journal = open_journal(tmp_path)
+    assert links(journal.load()) == links([news(1), news(2)])
+    # Новая запись не склеивается с оборванной строкой
+    journal.append(news(4))
+    journal.close()
+    assert links(open_journal(tmp_path).load()) == links([news(1), news(2), news(4)])
+
+def test_rotated_journal_is_folded_on_start(tmp_path):
+    journal = open_journal(tmp_path)
+    with open(journal.snapshot_path, 'w', encoding='utf-8') as f:
+        json.dump([news(1)], f)
+    # Сбой после ротации, до свертки: записи остались в .jsonl.1, новые - в .jsonl
+    write_lines(journal.rotated_path, [news(2), news(3)])
+    write_lines(journal.path, [news(4)])
+
+    journal = open_journal(tmp_path)
+    assert not os.path.exists(journal.rotated_path)
+    with open(journal.snapshot_path, encoding='utf-8') as f:
+        assert links(json.load(f)) == links([news(1), news(2), news(3)])
+    assert links(journal.load()) == links([news(1), news(2), news(3), news(4)])
+
+def test_fold_interrupted_after_snapshot_write_is_idempotent(tmp_path):
+    journal = open_journal(tmp_path)
+    # Снимок уже записан, но ротированный журнал удалить не успели
+    with open(journal.snapshot_path, 'w', encoding='utf-8') as f:
+        json.dump([news(1), news(2)], f)
+    write_lines(journal.rotated_path, [news(2)])
+
+    journal = open_journal(tmp_path)
+    assert links(journal.load()) == links([news(1), news(2)])
+
+def test_pending_operations_survive_interrupted_fold(tmp_path):
+    first, second = dict(news(1), id=0), dict(news(2), id=1)
+    journal = open_journal(tmp_path, apply_pending)
+    # Удаление уже попало в снимок, но остается и в ротированном журнале
+    with open(journal.snapshot_path, 'w', encoding='utf-8') as f:
+        json.dump([second], f)
+    write_lines(journal.rotated_path, [
+        {'op': 'remove', 'id': 0, 'link': first['link']},
+        {'op': 'update', 'news': dict(second, status='publishing')},
+    ])
+
+    journal = open_journal(tmp_path, apply_pending)
+    assert journal.load() == [dict(second, status='publishing')]
+
+def test_compaction_keeps_records_appended_meanwhile(tmp_path):
+    journal = open_journal(tmp_path, compact_lines=3)
+    for number in range(5):
+        journal.append(news(number))
+    journal.compact(wait=True)
+    journal.append(news(5))
+    journal.close()
+
+    assert not os.path.exists(journal.rotated_path)
+    assert links(open_journal(tmp_path).load()) == links([news(number) for number in range(6)])
+
+def test_unsynced_records_are_synced_after_interval(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd) or real_fsync(fd))
+    journal = open_journal(tmp_path, fsync_batch=10, fsync_interval=0.05)
+    journal.append(news(1))
+    journal.append(news(2))
+    assert journal._unsynced == 2 and not synced
+
+    # Новых записей нет, но через fsync_interval журнал все равно сбрасывается на диск
+    deadline = time.monotonic() + 2
+    while journal._unsynced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert journal._unsynced == 0 and len(synced) == 1
+    journal.close()
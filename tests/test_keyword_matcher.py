@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from config import KEYWORD_CATEGORIES, TECH_KEYWORDS
+from keyword_matcher import KeywordMatcher
+from news_parser import KEYWORD_MATCHER, BaseNewsParser
+
+# Категории, из которых собран KEYWORD_MATCHER
+KEYWORD_MATCHER_CATEGORIES = {
+    **KEYWORD_CATEGORIES,
+    'keywords': [keyword.lower() for keyword in TECH_KEYWORDS]
+}
+
+def naive_match(categories, text):
+    """Проверка `keyword in text` для каждого слова, как до KeywordMatcher"""
+    return frozenset(
+        category for category, keywords in categories.items()
+        if any(keyword in text for keyword in keywords if keyword)
+    )
+
+def old_is_tech_news(title):
+    """Фильтр заголовков в том виде, в каком он был до KeywordMatcher"""
+    title_lower = title.lower()
+    found = naive_match(KEYWORD_CATEGORIES, title_lower)
+    if 'tech' in found and found & {'startup', 'investment', 'company'}:
+        return True
+    return any(keyword.lower() in title_lower for keyword in TECH_KEYWORDS)
+
+def random_titles(count, seed=1):
+    """Заголовки из ключевых слов, их обрывков и обычных слов"""
+    keywords = [keyword for keywords in KEYWORD_CATEGORIES.values() for keyword in keywords] + TECH_KEYWORDS
+    plain = ['погода', 'футбол', 'выборы', 'Алматы', 'рынок', 'концерт', 'новости', 'город', 'зима']
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 5)):
+            word = rng.choice(keywords) if rng.random() < 0.3 else rng.choice(plain)
+            if rng.random() < 0.3:
+                # Обрывок слова; без пробела он склеивается с соседним
+                word = word[:rng.randint(1, len(word))]
+            parts.append(word.upper() if rng.random() < 0.2 else word)
+        titles.append(rng.choice([' ', '', '-']).join(parts))
+    return titles
+
+@pytest.mark.parametrize('text', [
+    '', 'стартап', 'стартапы', 'startups', 'ai', 'раунд series a', 'aiai', 'финтехстартап',
+])
+def test_overlapping_keywords(text):
+    assert KEYWORD_MATCHER.match(text) == naive_match(KEYWORD_MATCHER_CATEGORIES, text)
+
+def test_prefix_keywords_report_all_categories():
+    matcher = KeywordMatcher({'short': ['data'], 'long': ['database'], 'other': ['base']})
+    assert matcher.match('new database') == {'short', 'long', 'other'}
+    assert matcher.match('new data') == {'short'}
+
+def test_empty_categories():
+    assert KeywordMatcher({}).match('anything') == frozenset()
+    assert KeywordMatcher({'empty': ['']}).match('anything') == frozenset()
+
+def test_matches_naive_search_on_random_titles():
+    for title in random_titles(3000):
+        text = title.lower()
+        assert KEYWORD_MATCHER.match(text) == naive_match(KEYWORD_MATCHER_CATEGORIES, text), title
+
+def test_is_tech_news_matches_old_filter():
+    titles = random_titles(3000, seed=2) + [
+        'Казахстанский стартап привлек инвестиции на AI платформу',
+        'Новая технология для бизнеса',
+        'Погода на выходные',
+        'Футбольный клуб сменил тренера',
+    ]
+    for title in titles:
+        assert BaseNewsParser.is_tech_news(None, title) == old_is_tech_news(title), title
@@ -0,0 +1,113 @@
+from bloom_filter import BloomFilter
+from config import DEDUP_FILTER_CAPACITY, DEDUP_RECENT_LINKS
+from link_index import LinkIndex
+
+class FakeStorage:
+    """Хранилище с опубликованными ссылками в порядке публикации"""
+
+    def __init__(self, published, pending=()):
+        self.published = list(published)
+        self.pending = set(pending)
+        self.full_scans = 0
+
+    def load_recent_published_links(self, limit):
+        return self.published[-limit:] if limit > 0 else []
+
+    def count_published(self):
+        return len(self.published)
+
+    def iter_published_links(self):
+        self.full_scans += 1
+        return iter(self.published)
+
+    def load_pending_links(self):
+        return set(self.pending)
+
+def links(count, prefix='p'):
+    return [f'https://example.com/{prefix}/{number}' for number in range(count)]
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(5000, 0.01)
+    added = links(5000)
+    assert all(bloom.add(link) for link in added[:10])
+    for link in added[10:]:
+        bloom.add(link)
+    assert all(link in bloom for link in added)
+    false_positives = sum(link in bloom for link in links(20000, 'new'))
+    assert false_positives / 20000 < 0.02
+
+def test_bloom_filter_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'links.bloom')
+    bloom = BloomFilter(1000, 0.001)
+    for link in links(100):
+        bloom.add(link)
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert (loaded.capacity, loaded.num_bits, loaded.num_hashes, loaded.count) == \
+        (bloom.capacity, bloom.num_bits, bloom.num_hashes, bloom.count)
+    assert loaded._bits == bloom._bits
+
+def test_bloom_filter_rejects_damaged_files(tmp_path):
+    path = tmp_path / 'links.bloom'
+    assert BloomFilter.load(str(path)) is None
+    BloomFilter(1000, 0.001).save(str(path))
+    data = path.read_bytes()
+
+    path.write_bytes(b'XXXX' + data[4:])
+    assert BloomFilter.load(str(path)) is None
+    path.write_bytes(data[:-1])
+    assert BloomFilter.load(str(path)) is None
+
+def test_index_tracks_pending_and_published():
+    index = LinkIndex(pending=['https://example.com/a'])
+    assert 'https://example.com/a' in index
+    index.discard('https://example.com/a')
+    assert 'https://example.com/a' not in index
+
+    index.add('https://example.com/b')
+    index.publish('https://example.com/b')
+    assert 'https://example.com/b' in index and len(index) == 1
+
+def test_load_without_file_builds_filter_from_history(tmp_path):
+    path = str(tmp_path / 'links.bloom')
+    storage = FakeStorage(links(50), pending=['https://example.com/pending'])
+    index = LinkIndex.load(storage, path)
+    assert storage.full_scans == 1
+    assert all(link in index for link in storage.published + ['https://example.com/pending'])
+    assert BloomFilter.load(path).count == 50
+
+def test_load_catches_up_with_recent_publications(tmp_path):
+    path = str(tmp_path / 'links.bloom')
+    storage = FakeStorage(links(50))
+    LinkIndex.load(storage, path)
+    # Публикации без сохранения фильтра (например, из функции-вебхука)
+    storage.published += links(5, 'later')
+
+    index = LinkIndex.load(storage, path)
+    assert storage.full_scans == 1
+    assert all(link in index for link in storage.published)
+    assert BloomFilter.load(path).count == 55
+
+def test_load_rebuilds_when_filter_lags_too_far(tmp_path):
+    path = str(tmp_path / 'links.bloom')
+    storage = FakeStorage(links(10))
+    LinkIndex.load(storage, path)
+    storage.published += links(DEDUP_RECENT_LINKS + 1, 'later')
+
+    index = LinkIndex.load(storage, path)
+    assert storage.full_scans == 2
+    assert all(link in index for link in storage.published[:10])
+
+def test_load_rebuilds_overfull_filter_with_more_capacity(tmp_path):
+    path = str(tmp_path / 'links.bloom')
+    small = BloomFilter(10, 0.001)
+    published = links(20)
+    for link in published:
+        small.add(link)
+    small.save(path)
+
+    storage = FakeStorage(published)
+    index = LinkIndex.load(storage, path)
+    assert storage.full_scans == 1
+    assert index.history.capacity == max(DEDUP_FILTER_CAPACITY, 40)
@@ -0,0 +1,64 @@
+import pytest
+
+from config import (
+    NEAR_DUPLICATES_BANDS, NEAR_DUPLICATES_ROWS, NEAR_DUPLICATES_THRESHOLD, NEAR_DUPLICATES_WINDOW_HOURS
+)
+from near_duplicates import NearDuplicateDetector, title_tokens
+
+def detector():
+    return NearDuplicateDetector(
+        NEAR_DUPLICATES_BANDS, NEAR_DUPLICATES_ROWS, NEAR_DUPLICATES_THRESHOLD, NEAR_DUPLICATES_WINDOW_HOURS
+    )
+
+def news(title, source, number):
+    return {'title': title, 'source': source, 'link': f'https://{source}/{number}'}
+
+# Разные события с почти одинаковыми заголовками
+NEAR_MISSES = [
+    ("Kaspi запустил новое приложение для бизнеса",
+     "Uzum запустил новое приложение для бизнеса"),
+    ("В Ташкенте пройдет IT-конференция по искусственному интеллекту",
+     "В Алматы пройдет IT-конференция по искусственному интеллекту"),
+    ("Казахстанский стартап привлек 5 млн долларов инвестиций",
+     "Узбекский стартап привлек 2 млн долларов инвестиций"),
+]
+
+# Одно событие в пересказе разных источников
+SAME_STORY = [
+    ("Kaspi запустил новое приложение для бизнеса",
+     "Kaspi запустил новое приложение для бизнеса в Казахстане"),
+    ("Казахстанский стартап привлек 5 млн долларов инвестиций",
+     "Казахстанский стартап привлек 5 млн долларов инвестиции"),
+]
+
+@pytest.mark.parametrize('first, second', NEAR_MISSES)
+def test_near_miss_headlines_stay_separate(first, second):
+    cards, earlier = detector().cluster([news(first, 'a.kz', 1), news(second, 'b.kz', 2)])
+    assert len(cards) == 2 and not earlier
+    assert not any(card.get('duplicates') for card in cards)
+
+@pytest.mark.parametrize('first, second', SAME_STORY)
+def test_same_story_from_other_source_is_merged(first, second):
+    cards, earlier = detector().cluster([news(first, 'a.kz', 1), news(second, 'b.kz', 2)])
+    assert len(cards) == 1 and not earlier
+    assert cards[0]['duplicates'] == [{'title': second, 'link': 'https://b.kz/2', 'source': 'b.kz'}]
+
+@pytest.mark.parametrize('first, second', SAME_STORY)
+def test_same_source_is_never_merged(first, second):
+    cards, earlier = detector().cluster([news(first, 'a.kz', 1), news(second, 'a.kz', 2)])
+    assert len(cards) == 2 and not earlier
+
+def test_match_with_remembered_card_from_other_source():
+    found = detector()
+    first, second = SAME_STORY[0]
+    found.remember(news(first, 'a.kz', 1))
+    cards, earlier = found.cluster([news(second, 'b.kz', 2), news(second, 'a.kz', 3)])
+    assert [card['link'] for card in cards] == ['https://a.kz/3']
+    assert [(item['link'], match) for item, match in earlier] == [('https://b.kz/2', 'https://a.kz/1')]
+
+def test_tokens_keep_names_and_numbers():
+    assert title_tokens("Стартап привлек 5 млн") != title_tokens("Стартап привлек 2 млн")
+    assert title_tokens("Ташкенте") != title_tokens("Алматы")
+    # Падежные окончания и регистр не различаются
+    assert title_tokens("Стартапа") == title_tokens("стартап")
+    assert title_tokens("инвестиций") == title_tokens("инвестиции") == title_tokens("инвестиция")
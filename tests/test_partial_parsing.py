@@ -0,0 +1,63 @@
+import pytest
+
+from html_backends import SoupBackend, etree
+
+FEATURES = ['html.parser'] + (['lxml'] if etree is not None else [])
+
+PAGES = {
+    'containers': b"""
+        <html><head><title>Site</title></head><body>
+        <nav><a href="/menu">Menu</a></nav>
+        <article class="post"><h2><a href="/a">First story</a></h2></article>
+        <div class="news-item"><h3>Second story</h3><a href="/b">more</a></div>
+        </body></html>
+    """,
+    'nested': b"""
+        <div class="news-list">
+          <div class="card"><h4>Inner title</h4><a href="/c">read</a></div>
+          <section><div class="card"><a href="/d">Link as title</a></div></section>
+        </div>
+    """,
+    'headline_fallback': b"""
+        <html><body>
+        <div><h2>Plain headline</h2><a href="/e">go</a></div>
+        <div class="sidebar"><h3>Not an article class</h3></div>
+        </body></html>
+    """,
+    'malformed': b"""
+        <article class="post"><h2>Unclosed <p>para</h2><a href=/c>link</a>
+        <div class="item"><h3>Broken <b>bold</h3><a href="/i">x</a>
+    """,
+}
+
+FEED_PAGE = b"""
+    <html><head>
+    <link rel="alternate" type="application/rss+xml" href="/rss">
+    </head><body><article class="post"><h2>Story</h2></article></body></html>
+"""
+
+def extract_all(backend, content):
+    document = backend.parse(content)
+    return [backend.extract(article) for article in backend.find_articles(document)]
+
+@pytest.mark.parametrize('features', FEATURES)
+@pytest.mark.parametrize('name', sorted(PAGES))
+def test_partial_parsing_matches_full(features, name):
+    expected = extract_all(SoupBackend(features, partial=False), PAGES[name])
+    assert expected
+    assert extract_all(SoupBackend(features, partial=True), PAGES[name]) == expected
+
+@pytest.mark.parametrize('features', FEATURES)
+def test_feed_url_with_partial_parsing(features):
+    for partial in (True, False):
+        backend = SoupBackend(features, partial)
+        assert backend.find_feed_url(backend.parse(FEED_PAGE)) == '/rss'
+
+def test_page_without_containers_switches_to_full_tree():
+    backend = SoupBackend('html.parser', partial=True)
+    extract_all(backend, PAGES['headline_fallback'])
+    document = backend.parse(PAGES['containers'])
+    assert not document.partial
+    # Контейнеры снова нашлись: следующая страница разбирается частично
+    backend.find_articles(document)
+    assert backend.parse(PAGES['containers']).partial
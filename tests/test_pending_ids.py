@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from storage import JsonStorage, SqliteStorage
+
+# Старые данные: id выдавался как len(pending) и мог повториться
+LEGACY_PENDING = [
+    {'id': 0, 'link': 'https://example.com/a', 'title': 'A'},
+    {'id': 1, 'link': 'https://example.com/b', 'title': 'B'},
+    {'id': 1, 'link': 'https://example.com/c', 'title': 'C'},
+]
+
+@pytest.fixture(params=['json', 'sqlite'])
+def open_storage(request, tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    with open(data_dir / 'pending_news.json', 'w', encoding='utf-8') as f:
+        json.dump(LEGACY_PENDING, f)
+    opened = []
+
+    def open_storage():
+        if request.param == 'json':
+            storage = JsonStorage(str(data_dir))
+        else:
+            storage = SqliteStorage(str(tmp_path / 'news.db'), str(data_dir))
+        opened.append(storage)
+        return storage
+
+    yield open_storage
+    for storage in opened:
+        storage.close()
+
+def test_duplicate_ids_resolve_to_oldest_item(open_storage):
+    storage = open_storage()
+    assert storage.get_pending(1)['link'] == 'https://example.com/b'
+    storage.remove_pending(1)
+    assert storage.get_pending(1)['link'] == 'https://example.com/c'
+    assert [news['link'] for news in storage.load_pending()] == [
+        'https://example.com/a', 'https://example.com/c'
+    ]
+
+def test_update_touches_only_matching_link(open_storage):
+    storage = open_storage()
+    storage.update_pending(dict(LEGACY_PENDING[2], status='publishing'))
+    assert storage.get_pending(1).get('status') is None
+    storage.remove_pending(1)
+    assert storage.get_pending(1)['status'] == 'publishing'
+
+def test_ids_continue_after_largest_legacy_id(open_storage):
+    storage = open_storage()
+    assert storage.reserve_pending_id() == 2
+    assert storage.reserve_pending_id() == 3
+
+def test_removed_ids_are_not_reused(open_storage):
+    storage = open_storage()
+    news_id = storage.reserve_pending_id()
+    storage.add_pending({'id': news_id, 'link': 'https://example.com/d', 'title': 'D'})
+    for item in storage.load_pending():
+        storage.remove_pending(item['id'])
+    assert storage.count_pending() == 0
+    assert storage.reserve_pending_id() == news_id + 1
+    storage.close()
+
+    # Счетчик переживает перезапуск, даже если на модерации ничего не осталось
+    reopened = open_storage()
+    assert reopened.count_pending() == 0
+    assert reopened.reserve_pending_id() == news_id + 2
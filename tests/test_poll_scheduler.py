@@ -0,0 +1,90 @@
+import asyncio
+
+from poll_scheduler import PollScheduler
+
+def scheduler(path, initial=600, min_interval=300, max_interval=7200):
+    return PollScheduler(str(path), initial, min_interval, max_interval, jitter=0)
+
+def test_initial_interval_is_clamped(tmp_path):
+    assert scheduler(tmp_path / 's.json', initial=10).interval('s') == 300
+    assert scheduler(tmp_path / 's.json', initial=10 ** 6).interval('s') == 7200
+
+def test_interval_follows_publication_rate(tmp_path):
+    tracker = scheduler(tmp_path / 's.json')
+    tracker.start('s', now=0)
+    tracker.record('s', 30, now=1)
+    # Первый опрос дает всю страницу и частоту не меняет
+    assert tracker.interval('s') == 600
+
+    tracker.start('s', now=3600)
+    tracker.record('s', 4, now=3601)
+    assert tracker.interval('s') == 900  # 4 новости в час -> опрос раз в 15 минут
+
+def test_interval_is_clamped_to_limits(tmp_path):
+    busy = scheduler(tmp_path / 'busy.json')
+    busy.start('s', now=0)
+    busy.record('s', 0, now=0)
+    busy.start('s', now=3600)
+    busy.record('s', 1000, now=3600)
+    assert busy.interval('s') == 300
+
+    quiet = scheduler(tmp_path / 'quiet.json')
+    quiet.start('s', now=0)
+    quiet.record('s', 0, now=0)
+    quiet.start('s', now=3600)
+    quiet.record('s', 0, now=3600)
+    assert quiet.interval('s') == 7200
+
+def test_due_skips_sources_in_flight(tmp_path):
+    tracker = scheduler(tmp_path / 's.json')
+    assert tracker.due(['a', 'b'], now=0) == ['a', 'b']
+    tracker.start('a', now=0)
+    # Даже после срока запущенный опрос не повторяется
+    assert tracker.due(['a', 'b'], now=10 ** 6) == ['b']
+    tracker.record('a', 1, now=10)
+    assert tracker.due(['a'], now=10 + 600) == ['a']
+
+def test_release_keeps_interval_and_schedule(tmp_path):
+    tracker = scheduler(tmp_path / 's.json')
+    tracker.start('s', now=0)
+    tracker.record('s', 0, now=0)
+    tracker.start('s', now=600)
+    tracker.release('s')
+    entry = tracker._entry('s')
+    assert entry['last_poll'] == 0 and entry['rate'] is None and tracker.interval('s') == 600
+    assert tracker.due(['s'], now=1200) == ['s']
+
+def test_schedule_survives_restart_with_new_limits(tmp_path):
+    path = tmp_path / 's.json'
+    tracker = scheduler(path)
+    tracker.start('s', now=0)
+    tracker.record('s', 0, now=0)
+    tracker.save()
+    assert scheduler(path, min_interval=900).interval('s') == 900
+
+class FailingParser:
+    source_name = 'broken'
+
+    def parse_news(self, seen_links=None):
+        raise ConnectionError('down')
+
+    def commit_validators(self):
+        pass
+
+def test_failed_poll_is_released_not_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from news_parser import NewsParser
+    parser = NewsParser()
+    parser.parsers = [FailingParser()]
+    before = dict(parser.scheduler._entry('broken'))
+
+    async def consume():
+        return [item async for item in parser.iter_news()]
+
+    assert asyncio.run(consume()) == []
+    entry = parser.scheduler._entry('broken')
+    assert entry['interval'] == before['interval']
+    assert entry['rate'] is None and entry['last_poll'] is None
+    # Отметка запуска снята: источник снова виден расписанию
+    assert 'broken' not in parser.scheduler._started
+    parser.executor.shutdown()
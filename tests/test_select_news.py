@@ -0,0 +1,32 @@
+from config import EARLY_STOP_KNOWN_LINKS
+from news_parser import DigitalBusinessParser
+
+def item(number, title='Стартап привлек инвестиции на AI платформу'):
+    return {'title': f'{title} {number}', 'link': f'https://example.com/{number}'}
+
+def select(items, seen_links):
+    return DigitalBusinessParser()._select_news(items, seen_links)
+
+def links(items):
+    return [news['link'] for news in items]
+
+def test_stops_after_run_of_known_links():
+    known = [item(number) for number in range(EARLY_STOP_KNOWN_LINKS)]
+    seen = set(links(known))
+    selected = select(known + [item('new')], seen)
+    assert selected == []
+
+def test_repeated_known_link_counts_once():
+    # Вложенный контейнер повторяет первую новость много раз
+    first = item(0)
+    page = [first] * (EARLY_STOP_KNOWN_LINKS * 2) + [item('new')]
+    assert links(select(page, {first['link']})) == ['https://example.com/new']
+
+def test_repeated_new_link_is_selected_once():
+    page = [item(1), item(1), item(2)]
+    assert links(select(page, set())) == ['https://example.com/1', 'https://example.com/2']
+
+def test_non_tech_items_do_not_break_known_run():
+    known = [item(number) for number in range(EARLY_STOP_KNOWN_LINKS)]
+    page = known[:1] + [item('sport', 'Футбольный клуб сменил тренера')] + known[1:] + [item('new')]
+    assert select(page, set(links(known))) == []
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from send_queue import SendQueue
+
+class FakeBot:
+    def __init__(self):
+        self.calls = []
+
+    async def send_message(self, **kwargs):
+        self.calls.append(('send', time.monotonic()))
+
+    async def edit_message_text(self, **kwargs):
+        self.calls.append(('edit', time.monotonic()))
+
+def test_edits_do_not_wait_for_group_send_budget():
+    async def scenario():
+        queue = SendQueue(FakeBot())
+        started = time.monotonic()
+        # Первое сообщение забирает единственный токен группы (20 в минуту)
+        await queue.send_message(chat_id=-100, text='card')
+        await queue.edit_message_text(chat_id=-100, message_id=1, text='digest')
+        return time.monotonic() - started, queue.bot.calls
+
+    elapsed, calls = asyncio.run(scenario())
+    assert [kind for kind, _ in calls] == ['send', 'edit']
+    assert elapsed < 1
+
+def test_group_sends_are_paced():
+    async def scenario():
+        queue = SendQueue(FakeBot())
+        queue._chat_bucket(-100).rate = 20
+        started = time.monotonic()
+        for _ in range(3):
+            await queue.send_message(chat_id=-100, text='card')
+        return time.monotonic() - started
+
+    # Первое сразу, еще два - по 1/20 секунды
+    assert asyncio.run(scenario()) >= 0.09
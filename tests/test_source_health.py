@@ -0,0 +1,73 @@
+from source_health import CLOSED, HALF_OPEN, OPEN, SourceHealth, percentile
+
+def health(threshold=3):
+    return SourceHealth(window=10, failure_threshold=threshold, base_backoff=60, max_backoff=200)
+
+def state(tracker, source='s'):
+    return tracker._source(source).state
+
+def test_opens_after_threshold_failures():
+    tracker = health()
+    for _ in range(2):
+        tracker.record_failure('s', 1.0, 'timeout', now=0)
+    assert state(tracker) == CLOSED and tracker.allow_request('s', now=0)
+
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    assert state(tracker) == OPEN
+    assert tracker.snapshot('s')['retry_at'] == 60
+    assert not tracker.is_available('s', now=59)
+    assert not tracker.allow_request('s', now=59)
+
+def test_single_probe_after_backoff():
+    tracker = health(threshold=1)
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    assert tracker.is_available('s', now=60)
+    assert tracker.allow_request('s', now=60)
+    assert state(tracker) == HALF_OPEN
+    # Пока идет пробный опрос, второй не запускается
+    assert not tracker.allow_request('s', now=61)
+    assert not tracker.is_available('s', now=61)
+
+def test_failed_probe_doubles_backoff_up_to_limit():
+    tracker = health(threshold=1)
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    retry_at, backoffs = 60, []
+    for _ in range(3):
+        assert tracker.allow_request('s', now=retry_at)
+        tracker.record_failure('s', 1.0, 'timeout', now=retry_at)
+        entry = tracker._source('s')
+        backoffs.append(entry.backoff)
+        assert entry.state == OPEN and entry.retry_at == retry_at + entry.backoff
+        retry_at = entry.retry_at
+    assert backoffs == [120, 200, 200]
+
+def test_successful_probe_closes_circuit():
+    tracker = health(threshold=1)
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    assert tracker.allow_request('s', now=60)
+    tracker.record_success('s', 0.5)
+    entry = tracker._source('s')
+    assert entry.state == CLOSED and entry.backoff == 0 and entry.consecutive_failures == 0
+    # Новая серия ошибок снова начинается с базовой паузы
+    tracker.record_failure('s', 1.0, 'timeout', now=100)
+    assert tracker._source('s').backoff == 60
+
+def test_success_resets_failure_run():
+    tracker = health()
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    tracker.record_success('s', 0.5)
+    tracker.record_failure('s', 1.0, 'timeout', now=0)
+    assert state(tracker) == CLOSED
+
+def test_snapshot_statistics():
+    tracker = health()
+    for duration in (1.0, 2.0, 3.0):
+        tracker.record_success('s', duration)
+    tracker.record_failure('s', 4.0, 'boom', now=0)
+    snapshot = tracker.snapshot('s')
+    assert snapshot['polls'] == 4
+    assert snapshot['p50'] == 2.0 and snapshot['p95'] == 4.0
+    assert snapshot['error_rate'] == 0.25
+    assert snapshot['last_error'] == 'boom' and snapshot['retry_at'] is None
+    assert percentile([], 0.5) is None
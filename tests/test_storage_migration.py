@@ -0,0 +1,95 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage import JsonStorage, SqliteStorage, normalize_published
+
+NOW = datetime.now().replace(microsecond=0)
+LAST_YEAR = NOW.replace(year=NOW.year - 1)
+
+LEGACY_PUBLISHED = [
+    'https://example.com/old-1',
+    {'link': 'https://example.com/old-2', 'title': 'Old', 'timestamp': LAST_YEAR.isoformat()},
+    {'link': 'https://example.com/new', 'title': 'New', 'timestamp': NOW.isoformat()},
+    42,
+]
+
+LEGACY_PENDING = [
+    {'id': 0, 'link': 'https://example.com/p', 'title': 'Pending'},
+    {'id': 1, 'title': 'No link'},
+]
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    with open(data_dir / 'published_news.json', 'w', encoding='utf-8') as f:
+        json.dump(LEGACY_PUBLISHED, f)
+    with open(data_dir / 'pending_news.json', 'w', encoding='utf-8') as f:
+        json.dump(LEGACY_PENDING, f)
+    return data_dir
+
+def read_dir(path):
+    return {
+        name: (path / name).read_bytes()
+        for name in sorted(os.listdir(path)) if not name.startswith('news.db')
+    }
+
+def test_normalize_published_mixed_entries():
+    assert normalize_published(LEGACY_PUBLISHED) == [
+        {'link': 'https://example.com/old-1'}, LEGACY_PUBLISHED[1], LEGACY_PUBLISHED[2]
+    ]
+
+def test_migration_reads_mixed_published_and_skips_pending_without_link(data_dir, tmp_path):
+    storage = SqliteStorage(str(tmp_path / 'news.db'), str(data_dir))
+    assert [news['link'] for news in storage.load_published()] == [
+        'https://example.com/old-1', 'https://example.com/old-2', 'https://example.com/new'
+    ]
+    assert [news['link'] for news in storage.load_pending()] == ['https://example.com/p']
+    storage.close()
+
+def test_migration_does_not_change_json_files(data_dir, tmp_path):
+    before = read_dir(data_dir)
+    SqliteStorage(str(tmp_path / 'news.db'), str(data_dir)).close()
+    assert read_dir(data_dir) == before
+
+def test_second_start_does_not_migrate_again(data_dir, tmp_path):
+    storage = SqliteStorage(str(tmp_path / 'news.db'), str(data_dir))
+    storage.remove_pending(0)
+    storage.close()
+    # JSON-файлы могли измениться после переноса: база их больше не читает
+    with open(data_dir / 'pending_news.json', 'w', encoding='utf-8') as f:
+        json.dump([{'id': 5, 'link': 'https://example.com/later', 'title': 'Later'}], f)
+
+    storage = SqliteStorage(str(tmp_path / 'news.db'), str(data_dir))
+    assert storage.load_pending() == []
+    assert storage.count_published() == 3
+    storage.close()
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage_with_times(request, tmp_path):
+    data_dir = tmp_path / 'data'
+    if request.param == 'json':
+        storage = JsonStorage(str(data_dir))
+    else:
+        storage = SqliteStorage(str(tmp_path / 'news.db'))
+    for number, moment in enumerate([LAST_YEAR, NOW - timedelta(hours=1), NOW, NOW + timedelta(microseconds=5)]):
+        storage.add_published({'link': f'https://example.com/{number}', 'timestamp': moment.isoformat()})
+    storage.add_published({'link': 'https://example.com/undated'})
+    yield storage
+    storage.close()
+
+def between_links(storage, start=None, end=None):
+    return [news['link'] for news in storage.published_between(start, end)]
+
+def test_published_between_includes_start_and_excludes_end(storage_with_times):
+    storage = storage_with_times
+    assert between_links(storage, NOW - timedelta(hours=1), NOW) == ['https://example.com/1']
+    assert between_links(storage, NOW, NOW + timedelta(microseconds=5)) == ['https://example.com/2']
+    assert between_links(storage, NOW) == ['https://example.com/2', 'https://example.com/3']
+
+def test_published_between_open_bounds_skip_undated(storage_with_times):
+    assert between_links(storage_with_times) == [f'https://example.com/{number}' for number in range(4)]
+    assert between_links(storage_with_times, end=NOW - timedelta(hours=1)) == ['https://example.com/0']